@@ -0,0 +1,129 @@
+"""
+Memory used per object by the core Simulation_Frame classes, against
+equivalent plain __dict__ classes laid out the way they were before
+__slots__, plus the NodeStore columns for the same number of nodes.
+
+    python Driver_Code/memory_benchmark.py --nodes 1000000
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from collections import defaultdict
+
+import numpy as np
+
+# Ensure project root (containing `Simulation_Frame`) is on sys.path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from Simulation_Frame import Location, Node, Path, Inventory, Driver, Cluster
+from Simulation_Frame.nodestore import NodeStore
+
+
+# ---------------- BEFORE __slots__ ----------------
+class PlainLocation:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.snap = None
+        self.projected = None
+
+
+class PlainNode:
+    def __init__(self, item, value, location):
+        self.store = None
+        self.id = None
+        self.item = item
+        self.value = value
+        self.is_source = value > 0
+        self.location = location
+
+
+class PlainPath:
+    def __init__(self):
+        self.nodes = []
+        self.legs = []
+        self.changed = True
+        self.distance = 0.0
+
+
+class PlainInventory:
+    def __init__(self):
+        self.inventory = defaultdict(int)
+        self.weights = defaultdict(lambda: 1)
+        self.weight = 0
+
+
+class PlainDriver:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.inventory = PlainInventory()
+        self.location = PlainLocation(0, 0)
+
+
+class PlainCluster:
+    def __init__(self):
+        self.nodes = []
+        self.sinks = []
+        self.sources = []
+        self.size = 0
+        self.inventory = defaultdict(int)
+# -------------------------------------------
+
+
+def measure(build, count: int) -> float:
+    """Bytes allocated per object while build(count) runs and keeps its result."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build(count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    gc.collect()
+    return (after - before) / count
+
+
+def nodes_with_locations(node_cls, location_cls):
+    def build(count):
+        return [node_cls("rice", (i % 21) - 10 or 1, location_cls(77.0, 11.0)) for i in range(count)]
+    return build
+
+
+def node_store(count):
+    rng = np.random.default_rng(0)
+    store = NodeStore(count)
+    store.extend(["rice"] * count, rng.integers(1, 10, count), rng.uniform(10.9, 11.0, count), rng.uniform(76.9, 77.0, count))
+    return store
+
+
+def run(nodes: int, objects: int) -> None:
+    rows = [
+        ("Node + Location", nodes, nodes_with_locations(PlainNode, PlainLocation), nodes_with_locations(Node, Location)),
+        ("Location", nodes, lambda n: [PlainLocation(77.0, 11.0) for _ in range(n)], lambda n: [Location(77.0, 11.0) for _ in range(n)]),
+        ("Path", objects, lambda n: [PlainPath() for _ in range(n)], lambda n: [Path() for _ in range(n)]),
+        ("Inventory", objects, lambda n: [PlainInventory() for _ in range(n)], lambda n: [Inventory() for _ in range(n)]),
+        ("Driver", objects, lambda n: [PlainDriver(50) for _ in range(n)], lambda n: [Driver(50) for _ in range(n)]),
+        ("Cluster", objects, lambda n: [PlainCluster() for _ in range(n)], lambda n: [Cluster(nodes=[]) for _ in range(n)]),
+    ]
+    print(f"{'class':<16}{'count':>10}{'__dict__ B/obj':>16}{'__slots__ B/obj':>17}{'saved':>8}")
+    for name, count, plain, slotted in rows:
+        before = measure(plain, count)
+        after = measure(slotted, count)
+        print(f"{name:<16}{count:>10}{before:>16.1f}{after:>17.1f}{1 - after / before:>8.0%}")
+
+    per_row = measure(node_store, nodes)
+    total_objects = measure(nodes_with_locations(PlainNode, PlainLocation), nodes) * nodes
+    print(f"\nNodeStore columns for {nodes} nodes: {per_row:.1f} B/node, "
+          f"{per_row * nodes / 1e6:.1f} MB against {total_objects / 1e6:.1f} MB of plain Node + Location objects")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-object memory of the core simulation classes")
+    parser.add_argument("--nodes", type=int, default=1000000, help="Node and Location objects to allocate")
+    parser.add_argument("--objects", type=int, default=100000, help="Path, Inventory, Driver and Cluster objects to allocate")
+    args = parser.parse_args()
+    run(args.nodes, args.objects)
@@ -1,37 +1,821 @@
+import asyncio
+import heapq
+import math
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+import numpy as np
 import osmnx as ox
 import networkx as nx
 from .newprint import NewPrint
+from .constants import Constants
+from .graphcache import (graph_cache_key, load_cached_graph, save_cached_graph,
+                         load_cached_routing_graph, save_cached_routing_graph, hierarchy_cache_path)
+from .routinggraph import RoutingGraph
+from .contraction import ContractionHierarchy
+from .landmarks import LandmarkIndex
+from .distancecache import DistanceCache
+from .routecache import RouteLeg, RouteLegCache
+from .simplify import simplify_routing_graph
+from .tilestore import TileStore
+from .roadclient import RoadClient
+from .routingstats import RoutingStats
+from .distanceoracle import GridOracle
 newprint = NewPrint("osmrouter")
 
-# Global graph
+# networkx graph, only kept when init_graph(keep_graph=True), e.g. for plotting
 _gu = None
+# Compact routing graph every distance query runs on
+_graph: Optional[RoutingGraph] = None
+# Cache location of the current graph, reused for derived data such as hierarchies
+_cache_key = None
+_cache_dir = None
+# Contraction hierarchies per weight, see build_contraction_hierarchy
+_hierarchies = {}
+# ALT landmark indexes per weight, see build_landmarks
+_landmarks = {}
+# Approximate cell-to-cell distance tables per weight, see build_distance_oracle
+_oracles = {}
+# Free-flow speed behind the adaptive edge model, T0 = length / DEFAULT_SPEED_MPS
+DEFAULT_SPEED_MPS = 13.9
+# Bumped on every init_graph so cached snaps on Locations can be invalidated
+_graph_version = 0
+# Precomputed DistanceMatrix objects consulted before searching the graph
+_distance_matrices = []
+# Memoized node_distance results
+_distance_cache = DistanceCache(maxsize=Constants.DISTANCE_CACHE_SIZE)
+# Road routes between consecutive path nodes, shared by every Path, see route_legs
+_route_cache = RouteLegCache(maxsize=Constants.ROUTE_CACHE_SIZE)
+# What the last freshly built graph lost to simplification, see simplify_report
+_simplify_report = None
+# On-demand tiles for areas too large for one graph, see init_tiles
+_tile_store: Optional[TileStore] = None
+# Routing service answering queries while no local graph is loaded, see use_road_service
+_road_client: Optional[RoadClient] = None
+# Worker threads for batched queries to the routing service, see road_distances
+_executor: Optional[ThreadPoolExecutor] = None
+# Where routing time goes, see routing_stats
+_stats = RoutingStats()
 
-def init_graph(center_point: tuple[float, float], dist: float = 5000) -> None:
+def init_graph(center_point: tuple[float, float], dist: float = 5000,
+               network_type: str = "drive", graphml_path: Optional[str] = None,
+               cache_dir: Optional[str] = Constants.GRAPH_CACHE_DIR,
+               keep_graph: bool = False, contraction_hierarchy: bool = False,
+               landmarks: int = 0, largest_component: bool = True,
+               contract_chains: bool = True, distance_oracle: bool = False) -> None:
     """
     center_point: (lat, lon)
     dist: radius in meters
+    network_type: osmnx network type to download
+    graphml_path: load the graph from a local osmnx GraphML file instead of downloading it
+    cache_dir: directory for the processed graph cache, None disables caching
+    keep_graph: also keep the networkx graph in memory (plotting, adaptive weight updates)
+    contraction_hierarchy: build (or load) a contraction hierarchy for the length weight
+    landmarks: number of ALT landmarks to precompute for the length weight, 0 disables A*
+    largest_component: drop road fragments not connected to the main network, so every snap is reachable
+    contract_chains: merge the two edges of nodes that only link two others into one edge
+    distance_oracle: build the approximate grid distance oracle for the length weight, used by refine_top_k
     """
-    global _gu
-    G_directed = ox.graph_from_point(center_point, dist=dist, network_type="drive")
-    _gu = ox.convert.to_undirected(G_directed)
-    newprint.newprint(f"Graph initialized with {len(_gu.nodes)} nodes and {len(_gu.edges)} edges",skipconsole=True)
+    global _gu, _graph, _graph_version, _cache_key, _cache_dir, _simplify_report
+    start = time.perf_counter()
+    options = {"undirected": True, "largest_component": largest_component, "contract_chains": contract_chains}
+    key = graph_cache_key(center_point, dist, network_type, options, source=graphml_path)
+    _gu = None
+    _graph = None
+    _simplify_report = None
+    if cache_dir:
+        _graph = load_cached_routing_graph(key, cache_dir)
+        if keep_graph or _graph is None:
+            _gu = load_cached_graph(key, cache_dir)
+    if _gu is None and (keep_graph or _graph is None):
+        if graphml_path:
+            G_directed = ox.load_graphml(graphml_path)
+        else:
+            G_directed = ox.graph_from_point(center_point, dist=dist, network_type=network_type)
+        _gu = ox.convert.to_undirected(G_directed)
+        if largest_component or contract_chains:
+            _gu, _simplify_report = simplify_routing_graph(_gu, largest=largest_component, contract=contract_chains)
+            newprint.newprint(f"Graph simplified from {_simplify_report['nodes_before']} to {_simplify_report['nodes_after']} nodes "
+                              f"({_simplify_report['fragment_nodes_removed']} in fragments, {_simplify_report['chain_nodes_removed']} in chains) "
+                              f"and from {_simplify_report['edges_before']} to {_simplify_report['edges_after']} edges",skipconsole=True)
+        if cache_dir:
+            save_cached_graph(_gu, key, cache_dir)
+    else:
+        newprint.newprint(f"Graph loaded from cache {key} in {time.perf_counter() - start:.2f}s",skipconsole=True)
+    if _graph is None:
+        _graph = RoutingGraph.from_networkx(_gu)
+        if cache_dir:
+            save_cached_routing_graph(_graph, key, cache_dir)
+    if not keep_graph:
+        _gu = None
+    _build_node_index()
+    _graph_version += 1
+    _cache_key = key
+    _cache_dir = cache_dir
+    _hierarchies.clear()
+    _landmarks.clear()
+    _oracles.clear()
+    _distance_matrices.clear()
+    _distance_cache.clear()
+    _route_cache.clear()
+    if contraction_hierarchy:
+        build_contraction_hierarchy("length")
+    if landmarks:
+        build_landmarks("length", k=landmarks)
+    if distance_oracle:
+        build_distance_oracle("length")
+    newprint.newprint(f"Graph initialized with {len(_graph)} nodes and {_graph.num_edges} edges ({_graph.nbytes / 1e6:.1f} MB)",skipconsole=True)
+
+def _build_node_index() -> None:
+    """Project the graph and build the KD-tree used for snapping up front rather than on the first query."""
+    _graph.nearest_xy(_graph.xy[:1])
+
+def use_road_service(host: str = Constants.ROAD_SERVICE_HOST, port: int = Constants.ROAD_SERVICE_PORT,
+                     **kwargs) -> RoadClient:
+    """
+    Send snapping and distance queries to a running road-microservice/server.py
+    instead of loading a graph in this process. A graph loaded with init_graph
+    takes precedence over the service.
+    """
+    global _road_client, _graph_version
+    client = RoadClient(host, port, **kwargs)
+    info = client.health()
+    if _road_client is not None:
+        _road_client.close()
+    _road_client = client
+    _graph_version += 1
+    _distance_matrices.clear()
+    _distance_cache.clear()
+    _route_cache.clear()
+    newprint.newprint(f"Using road service at {host}:{port} with {info['nodes']} nodes and {info['edges']} edges",skipconsole=True)
+    return client
+
+def remote_client() -> Optional[RoadClient]:
+    """The road service client when queries go to the service, i.e. no local graph is loaded."""
+    return _road_client if _graph is None else None
+
+def _require_graph() -> RoutingGraph:
+    if _graph is None:
+        raise RuntimeError("Graph not initialized. Call init_graph first.")
+    return _graph
+
+def get_graph() -> nx.MultiGraph:
+    """The networkx graph, available when init_graph was called with keep_graph=True."""
+    if _gu is None:
+        raise RuntimeError("networkx graph not kept. Call init_graph with keep_graph=True.")
+    return _gu
+
+def get_routing_graph() -> RoutingGraph:
+    return _require_graph()
+
+def update_weights(weight: str = "heuristic") -> None:
+    """
+    Reload one edge weight from the networkx graph into the routing graph, e.g.
+    after initialize_adaptive_edges or the adaptive model changed it.
+    """
+    _require_graph().set_weight(weight, get_graph())
+    _hierarchies.pop(weight, None)
+    _oracles.pop(weight, None)
+    if weight in _landmarks and not _landmarks[weight].bounded:
+        del _landmarks[weight]
+    _distance_cache.clear(weight)
+    _route_cache.clear(weight)
+    for matrix in [matrix for matrix in _distance_matrices if matrix.weight == weight]:
+        _distance_matrices.remove(matrix)
+
+def simplify_report() -> Optional[dict]:
+    """Node and edge counts before and after simplification, None when the graph came from the cache or was not simplified."""
+    return _simplify_report
+
+def graph_version() -> int:
+    return _graph_version
+
+def snap_points(points) -> np.ndarray:
+    """
+    Snap an array of (lat, lon) points to their nearest graph nodes in one call.
+    Returns an array of graph node ids in the same order as points.
+    """
+    start = time.perf_counter()
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    client = remote_client()
+    if client is not None:
+        nodes = np.asarray(client.nearest(points.tolist()), dtype=np.int64)
+    else:
+        graph = _require_graph()
+        nodes = graph.node_ids[graph.nearest(points)]
+    _stats.record_snap(len(points), time.perf_counter() - start)
+    return nodes
+
+def nearest_node(lat: float, lon: float):
+    """Nearest graph node to a single (lat, lon) point."""
+    return snap_points([(lat, lon)])[0].item()
+
+def project_points(points) -> np.ndarray:
+    """(lat, lon) points as (x, y) meters in the frame of the loaded graph."""
+    return _require_graph().project(points)
+
+def project_locations(locations: Iterable) -> np.ndarray:
+    """
+    (x, y) meters of every Location, shape (n, 2). Each Location keeps its
+    projection for the current graph, so only new ones are projected, in one batch.
+    """
+    locations = list(locations)
+    graph = _require_graph()
+    fresh = [location for location in locations
+             if location.projected is None or location.projected[0] != _graph_version]
+    if fresh:
+        xy = graph.project([location.latlon() for location in fresh])
+        for location, point in zip(fresh, xy.tolist()):
+            location.projected = (_graph_version, tuple(point))
+    return np.array([location.projected[1] for location in locations], dtype=np.float64).reshape(-1, 2)
+
+def snap_locations(locations: Iterable) -> None:
+    """Snap every Location in one batch and store the result on each of them."""
+    locations = list(locations)
+    if not locations:
+        return
+    if remote_client() is not None:
+        nodes = snap_points([location.latlon() for location in locations])
+    else:
+        start = time.perf_counter()
+        graph = _require_graph()
+        nodes = graph.node_ids[graph.nearest_xy(project_locations(locations))]
+        _stats.record_snap(len(locations), time.perf_counter() - start)
+    for location, node in zip(locations, nodes):
+        location.set_node(node.item())
+
+def cache_location() -> tuple:
+    """(cache key, cache directory) of the current graph, cache directory is None when caching is off."""
+    return _cache_key, _cache_dir
+
+def use_distance_matrix(matrix) -> None:
+    """Answer node_distance from a computed DistanceMatrix whenever it covers the pair."""
+    _distance_matrices.append(matrix)
+
+def drop_distance_matrix(matrix) -> None:
+    if matrix in _distance_matrices:
+        _distance_matrices.remove(matrix)
+
+def clear_distance_matrices() -> None:
+    _distance_matrices.clear()
+
+def build_contraction_hierarchy(weight: str = "length", persist: bool = True) -> ContractionHierarchy:
+    """
+    Contract the routing graph for one weight so node_distance answers with a
+    bidirectional upward search instead of a full Dijkstra. The hierarchy is
+    stored next to the graph cache and reused while the graph and weight are unchanged.
+    """
+    graph = _require_graph()
+    path = hierarchy_cache_path(_cache_key, _cache_dir, weight) if persist and _cache_dir else None
+    hierarchy = ContractionHierarchy.load_for(path, graph, weight) if path and os.path.exists(path) else None
+    if hierarchy is None:
+        start = time.perf_counter()
+        hierarchy = ContractionHierarchy.build(graph, weight)
+        newprint.newprint(f"Contraction hierarchy for {weight} built in {time.perf_counter() - start:.1f}s with {hierarchy.num_shortcuts} upward edges",skipconsole=True)
+        if path:
+            os.makedirs(_cache_dir, exist_ok=True)
+            with open(path, "wb") as f:
+                hierarchy.save(f)
+    _hierarchies[weight] = hierarchy
+    return hierarchy
+
+def drop_contraction_hierarchy(weight: str = "length") -> None:
+    _hierarchies.pop(weight, None)
+
+def validate_contraction_hierarchy(weight: str = "length", pairs: int = 100, seed: int = 0) -> dict:
+    """Check the hierarchy for weight against plain Dijkstra on random node pairs."""
+    if weight not in _hierarchies:
+        raise RuntimeError(f"No contraction hierarchy for {weight}. Call build_contraction_hierarchy first.")
+    report = _hierarchies[weight].validate(_require_graph(), pairs=pairs, seed=seed)
+    newprint.newprint(f"Contraction hierarchy validation: {len(report['mismatches'])} mismatches in {pairs} pairs, {report['ch_avg_ms']:.3f}ms vs {report['dijkstra_avg_ms']:.3f}ms per query",skipconsole=True)
+    return report
+
+def build_landmarks(weight: str = "length", k: int = 8, seed: int = 0) -> LandmarkIndex:
+    """
+    Precompute ALT landmarks so node_distance runs A* instead of plain Dijkstra.
+    For the adaptive heuristic weight the bounds are computed on the free-flow
+    time length / DEFAULT_SPEED_MPS, which the adaptive cost never drops below,
+    so the index stays valid while the model updates edge weights.
+    """
+    graph = _require_graph()
+    bound_weights = None
+    if weight == "heuristic" and graph.has_weight("length"):
+        bound_weights = np.minimum(graph.weight_array("length") / DEFAULT_SPEED_MPS, graph.weight_array("heuristic"))
+    start = time.perf_counter()
+    index = LandmarkIndex.build(graph, weight, k=k, seed=seed, bound_weights=bound_weights)
+    newprint.newprint(f"{len(index.landmarks)} landmarks for {weight} built in {time.perf_counter() - start:.2f}s",skipconsole=True)
+    _landmarks[weight] = index
+    return index
+
+def drop_landmarks(weight: str = "length") -> None:
+    _landmarks.pop(weight, None)
+
+def build_distance_oracle(weight: str = "length", cell_m: float = Constants.ORACLE_CELL_M) -> GridOracle:
+    """
+    Precompute road distances between grid cell representatives, so approx_distance
+    answers in constant time with a per-query error bound. Costs one search per
+    non-empty cell.
+    """
+    graph = _require_graph()
+    start = time.perf_counter()
+    oracle = GridOracle.build(graph, weight, cell_m)
+    newprint.newprint(f"Distance oracle for {weight} built in {time.perf_counter() - start:.1f}s over {len(oracle.representatives)} cells, max radius {oracle.max_radius:.0f}",skipconsole=True)
+    _oracles[weight] = oracle
+    return oracle
+
+def drop_distance_oracle(weight: str = "length") -> None:
+    _oracles.pop(weight, None)
+
+def approx_distance(orig_node, dest_node, weight: str = "length") -> tuple:
+    """
+    (estimate, error bound) for the road distance between two graph nodes; the
+    exact distance lies within estimate +- bound. Exact (bound 0) without an oracle.
+    """
+    oracle = _oracles.get(weight)
+    if oracle is None or remote_client() is not None:
+        return node_distance(orig_node, dest_node, weight), 0.0
+    orig, dest = _require_graph().index_of([orig_node, dest_node]).tolist()
+    return oracle.estimate(orig, dest)
+
+def refine_top_k(origin, candidates: Iterable, k: int, weight: str = "length") -> List[tuple]:
+    """
+    The k candidates closest to origin by road as sorted (distance, candidate)
+    pairs, like k_nearest_by_road. The oracle's bounds rule out candidates that
+    cannot make the top k and exact distances are only computed for the rest.
+    Ties keep the order of candidates.
+    """
+    candidates = list(candidates)
+    if not candidates or k <= 0:
+        return []
+    locations = [_location_of(item) for item in [origin] + candidates if not isinstance(item, tuple)]
+    snap_locations(location for location in locations if location.snap is None)
+    orig_node = _query_node(origin)
+    cand_nodes = [_query_node(candidate) for candidate in candidates]
+
+    # distances already in a matrix or the cache cost nothing, only the rest are worth bounding
+    start = time.perf_counter()
+    exact = {}
+    answered_by = Counter()
+    for i, node in enumerate(cand_nodes):
+        found, source = (0.0, "cache") if node == orig_node else _known_distance(orig_node, node, weight)
+        if found is not None:
+            exact[i] = found
+            answered_by[source] += 1
+    for name, count in answered_by.items():
+        _stats.record_query(weight, name, (time.perf_counter() - start) * count / len(exact), queries=count)
+    unknown = [i for i in range(len(candidates)) if i not in exact]
+
+    oracle = _oracles.get(weight)
+    if unknown and oracle is not None and remote_client() is None and len(candidates) > k:
+        start = time.perf_counter()
+        graph = _require_graph()
+        source = graph.index_of([orig_node]).item()
+        lower, upper = oracle.lower_upper(source, graph.index_of([cand_nodes[i] for i in unknown]))
+        # anything in the true top k is at most the k-th smallest upper bound away
+        kth_upper = sorted(list(exact.values()) + upper.tolist())[k - 1]
+        unknown = [i for i, low in zip(unknown, lower.tolist()) if low <= kth_upper]
+        _stats.record_query(weight, "oracle", time.perf_counter() - start, queries=len(lower))
+    if unknown:
+        dests = list(dict.fromkeys(cand_nodes[i] for i in unknown))
+        found = dict(zip(dests, _distances_from_node(orig_node, dests, weight)))
+        for dest, distance in found.items():
+            _distance_cache.put(orig_node, dest, weight, distance)
+        for i in unknown:
+            exact[i] = found[cand_nodes[i]]
+    ranked = sorted((distance, i) for i, distance in exact.items())[:k]
+    return [(distance, candidates[i]) for distance, i in ranked]
+
+def configure_distance_cache(maxsize: int) -> None:
+    """Resize the node_distance cache, 0 disables it."""
+    _distance_cache.resize(maxsize)
+
+def clear_distance_cache(weight: Optional[str] = None) -> None:
+    """
+    Forget cached distances. Call this after edge weights change, e.g. once the
+    adaptive model has updated the heuristic weight.
+    """
+    _distance_cache.clear(weight)
+
+def distance_cache_stats() -> dict:
+    return _distance_cache.stats()
+
+def node_distance(orig_node, dest_node, weight: str = "length") -> float:
+    """Shortest path distance on the road network between two snapped graph nodes."""
+    start = time.perf_counter()
+    client = remote_client()
+    graph = _require_graph() if client is None else None
+    for matrix in _distance_matrices:
+        if matrix.weight != weight:
+            continue
+        found = matrix.lookup(orig_node, dest_node)
+        if found is not None:
+            _stats.record_query(weight, "matrix", time.perf_counter() - start)
+            return found
+    found = _distance_cache.get(orig_node, dest_node, weight)
+    if found is not None:
+        _stats.record_query(weight, "cache", time.perf_counter() - start)
+        return found
+    if client is not None:
+        distance = client.distances([(orig_node, dest_node)], weight)[0]
+        _distance_cache.put(orig_node, dest_node, weight, distance)
+        _stats.record_query(weight, "service", time.perf_counter() - start, settled=0)
+        return distance
+    orig, dest = graph.index_of([orig_node, dest_node]).tolist()
+    distance, answered_by, settled = _point_search(graph, orig, dest, weight)
+    _distance_cache.put(orig_node, dest_node, weight, distance)
+    _stats.record_query(weight, answered_by, time.perf_counter() - start, settled=settled)
+    return distance
+
+def _point_search(graph: RoutingGraph, orig: int, dest: int, weight: str) -> tuple:
+    """
+    One point-to-point search between compact indices, on the contraction
+    hierarchy, else ALT landmarks, else plain Dijkstra.
+    Returns (distance, answered_by, settled).
+    """
+    hierarchy = _hierarchies.get(weight)
+    if hierarchy is not None:
+        distance, settled = hierarchy.search(orig, dest)
+        return distance, "hierarchy", settled
+    if weight in _landmarks:
+        # length is in meters, so the straight line to dest bounds it as well
+        lower_bound = graph.straight_line_to(dest) if weight == "length" else None
+        distance, settled = _landmarks[weight].search(graph, orig, dest, weight, lower_bound)
+        return distance, "landmarks", settled
+    if orig == dest:
+        return 0.0, "dijkstra", 0
+    if weight == "length":
+        # settle only the disc a plausible detour reaches; distances inside the limit are exact,
+        # so the full search below is only needed when the road route is longer than that
+        limit = graph.straight_line_to(dest)(orig) * Constants.POINT_SEARCH_DETOUR
+        row = graph.distances_from(orig, weight, limit=limit)
+        settled = int(np.count_nonzero(np.isfinite(row)))
+        if np.isfinite(row[dest]):
+            return float(row[dest]), "dijkstra", settled
+    else:
+        settled = 0
+    row = graph.distances_from(orig, weight)
+    return float(row[dest]), "dijkstra", settled + int(np.count_nonzero(np.isfinite(row)))
 
 def road_distance(lat1: float, lon1: float, lat2: float, lon2: float,
                   weight: str = "length") -> float:
     """Shortest path distance on the road network between two geo points."""
-    if _gu is None:
-        raise RuntimeError("Graph not initialized. Call init_graph first.")
+    if remote_client() is None:
+        _require_graph()
     newprint.newprint(f"Calculating road distance between {lat1}, {lon1} and {lat2}, {lon2}",skipconsole=True)
-    # osmnx expects X=lon, Y=lat
-    orig_node = ox.distance.nearest_nodes(_gu, X=lon1, Y=lat1)
-    dest_node = ox.distance.nearest_nodes(_gu, X=lon2, Y=lat2)
+    orig_node, dest_node = snap_points([(lat1, lon1), (lat2, lon2)]).tolist()
     newprint.newprint(f"Nearest nodes: {orig_node}, {dest_node}",skipconsole=True)   
-    return nx.shortest_path_length(_gu, orig_node, dest_node, weight=weight)
+    return node_distance(orig_node, dest_node, weight=weight)
+
+def init_tiles(origin: tuple[float, float], tile_m: float = Constants.TILE_SIZE_M,
+               overlap_m: float = Constants.TILE_OVERLAP_M, max_tiles: int = Constants.MAX_LOADED_TILES,
+               network_type: str = "drive", contract_chains: bool = True,
+               directory: Optional[str] = None, download: bool = True) -> TileStore:
+    """
+    Set up a tiled road graph anchored at origin (lat, lon) for metro sized
+    areas. Tiles are read from directory (under the graph cache by default),
+    downloaded on first use when download is on, and evicted least recently
+    used beyond max_tiles. Independent of init_graph.
+    """
+    global _tile_store
+    _tile_store = TileStore(origin, tile_m=tile_m, overlap_m=overlap_m, max_tiles=max_tiles,
+                            network_type=network_type, contract_chains=contract_chains,
+                            directory=directory, download=download)
+    return _tile_store
+
+def get_tile_store() -> TileStore:
+    if _tile_store is None:
+        raise RuntimeError("Tiles not initialized. Call init_tiles first.")
+    return _tile_store
+
+def tiled_road_distance(lat1: float, lon1: float, lat2: float, lon2: float,
+                        weight: str = "length", pad: int = 0) -> float:
+    """
+    Road distance searched only on the tiles spanned by the two points.
+    Detours leaving those tiles and their overlap are not seen; pad adds rings
+    of tiles around them for such cases.
+    """
+    region = get_tile_store().region_around([(lat1, lon1), (lat2, lon2)], pad=pad)
+    if len(region) == 0:
+        return math.inf
+    orig, dest = region.nearest([(lat1, lon1), (lat2, lon2)]).tolist()
+    return region.distance(orig, dest, weight)
+
+def _query_node(item):
+    """Graph node of a (lat, lon) tuple, a Location or anything with a .location."""
+    if isinstance(item, tuple):
+        return nearest_node(*item)
+    return _location_of(item).get_node()
+
+def _known_distance(u, v, weight: str) -> tuple:
+    """(distance, "matrix" or "cache") if it is known without searching, otherwise (None, None)."""
+    for matrix in _distance_matrices:
+        if matrix.weight == weight:
+            found = matrix.lookup(u, v)
+            if found is not None:
+                return found, "matrix"
+    found = _distance_cache.get(u, v, weight)
+    if found is not None:
+        return found, "cache"
+    return None, None
+
+def _plan_batch(pairs: list, weight: str):
+    """
+    Resolve what the matrices and cache already know and group the rest by
+    origin. Returns (node pairs, known distances by pair, {origin: [destinations]}).
+    """
+    locations = [_location_of(item) for pair in pairs for item in pair if not isinstance(item, tuple)]
+    snap_locations(location for location in locations if location.snap is None)
+    node_pairs = [(_query_node(a), _query_node(b)) for a, b in pairs]
+
+    start = time.perf_counter()
+    known = {}
+    pending = []
+    answered_by = Counter()
+    for u, v in dict.fromkeys(node_pairs):
+        if (v, u) in known or u == v:
+            known[(u, v)] = known.get((v, u), 0.0)
+            continue
+        found, source = _known_distance(u, v, weight)
+        if found is None:
+            pending.append((u, v))
+        else:
+            answered_by[source] += 1
+            known[(u, v)] = found
+    for name, count in answered_by.items():
+        _stats.record_query(weight, name, (time.perf_counter() - start) * count / sum(answered_by.values()), queries=count)
+
+    # distances are symmetric, so search from whichever end is shared by more pairs
+    counts = Counter(node for pair in pending for node in pair)
+    groups = {}
+    for u, v in pending:
+        origin, dest = (u, v) if counts[u] >= counts[v] else (v, u)
+        groups.setdefault(origin, {})[dest] = None
+    return node_pairs, known, {origin: list(dests) for origin, dests in groups.items()}
+
+def _distances_from_node(origin, dests: list, weight: str) -> list:
+    start = time.perf_counter()
+    client = remote_client()
+    if client is not None:
+        distances = client.matrix([origin], dests, weight)[0].tolist()
+        _stats.record_query(weight, "service", time.perf_counter() - start, settled=0, queries=len(dests))
+        return distances
+    graph = _require_graph()
+    source = graph.index_of([origin]).item()
+    targets = graph.index_of(dests)
+    # a few point queries on a hierarchy or landmarks beat settling the whole
+    # graph, e.g. the one new leg when a node is appended to a Path
+    point_searches = weight in _hierarchies or weight in _landmarks
+    if point_searches and len(dests) <= Constants.POINT_SEARCH_LIMIT:
+        distances, settled = [], 0
+        for target in targets.tolist():
+            distance, answered_by, searched = _point_search(graph, source, target, weight)
+            distances.append(distance)
+            settled += searched
+        _stats.record_query(weight, answered_by, time.perf_counter() - start, settled=settled, queries=len(dests))
+        return distances
+    row = graph.distances_from(source, weight)
+    _stats.record_query(weight, "dijkstra", time.perf_counter() - start,
+                        settled=int(np.count_nonzero(np.isfinite(row))), queries=len(dests))
+    return row[targets].tolist()
+
+def _finish_batch(node_pairs: list, known: dict, groups: dict, rows: list, weight: str) -> List[float]:
+    for (origin, dests), row in zip(groups.items(), rows):
+        for dest, distance in zip(dests, row):
+            known[(origin, dest)] = distance
+            _distance_cache.put(origin, dest, weight, distance)
+    return [known[(u, v)] if (u, v) in known else known[(v, u)] for u, v in node_pairs]
+
+def _routing_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=Constants.ROUTING_WORKERS, thread_name_prefix="osmrouter")
+    return _executor
+
+def road_distances(pairs: Iterable, weight: str = "length") -> List[float]:
+    """
+    Road distances for many (origin, destination) pairs at once, in order.
+    Endpoints may be (lat, lon) tuples, Locations or nodes. Pairs are
+    deduplicated, answered from matrices and the cache where possible, and
+    the rest grouped so each distinct origin is searched once. Local searches
+    hold the GIL, so they run one after another; only requests to the routing
+    service are spread over the worker threads.
+    """
+    node_pairs, known, groups = _plan_batch(list(pairs), weight)
+    if remote_client() is None or len(groups) <= 1:
+        rows = _distances_from_groups(groups, weight)
+    else:
+        rows = list(_routing_executor().map(lambda group: _distances_from_node(*group, weight), groups.items()))
+    return _finish_batch(node_pairs, known, groups, rows, weight)
+
+def _distances_from_groups(groups: dict, weight: str) -> list:
+    return [_distances_from_node(origin, dests, weight) for origin, dests in groups.items()]
+
+async def road_distance_many(pairs: Iterable, weight: str = "length") -> List[float]:
+    """
+    road_distances for asyncio code: the work runs on the worker threads while
+    the event loop keeps going. Service requests are sent concurrently, local
+    searches run as one job.
+    """
+    node_pairs, known, groups = _plan_batch(list(pairs), weight)
+    loop = asyncio.get_running_loop()
+    executor = _routing_executor()
+    if remote_client() is None:
+        rows = await loop.run_in_executor(executor, _distances_from_groups, groups, weight)
+    else:
+        rows = await asyncio.gather(*(loop.run_in_executor(executor, _distances_from_node, origin, dests, weight)
+                                      for origin, dests in groups.items()))
+    return _finish_batch(node_pairs, known, groups, rows, weight)
+
+def route_legs(pairs: Iterable, weight: str = "length", geometry: bool = False) -> List[RouteLeg]:
+    """
+    RouteLegs for many (origin, destination) pairs, in order. Endpoints are
+    accepted as in road_distances. Legs are looked up in the shared route
+    cache first; missing distances are answered like road_distances and, with
+    geometry on, missing node sequences by one search per distinct origin.
+    """
+    pairs = list(pairs)
+    locations = [_location_of(item) for pair in pairs for item in pair if not isinstance(item, tuple)]
+    snap_locations(location for location in locations if location.snap is None)
+    node_pairs = [(_query_node(a), _query_node(b)) for a, b in pairs]
+
+    legs = {}
+    missing = {}
+    for pair, (a, b) in zip(node_pairs, pairs):
+        if pair in legs or pair in missing:
+            continue
+        leg = _route_cache.get(*pair, weight)
+        if leg is not None and (leg.nodes is not None or not geometry):
+            legs[pair] = leg
+        else:
+            missing[pair] = (a, b, leg)
+    if missing and geometry:
+        for leg in _route_geometry(list(missing), weight):
+            cached = missing[(leg.orig_node, leg.dest_node)][2]
+            if cached is not None:
+                # keep the distance paths were already measured with
+                leg.distance = cached.distance
+            legs[(leg.orig_node, leg.dest_node)] = leg
+            _route_cache.put(leg, weight)
+    elif missing:
+        distances = road_distances([(a, b) for a, b, _ in missing.values()], weight)
+        for (u, v), distance in zip(missing, distances):
+            legs[(u, v)] = RouteLeg(u, v, distance)
+            _route_cache.put(legs[(u, v)], weight)
+    return [legs[pair] for pair in node_pairs]
+
+def _route_geometry(node_pairs: list, weight: str) -> List[RouteLeg]:
+    """Legs with their node sequences for pairs of graph nodes, unreachable legs have an empty sequence."""
+    start = time.perf_counter()
+    client = remote_client()
+    if client is not None:
+        distances, paths = client.legs(node_pairs, weight)
+        _stats.record_query(weight, "service", time.perf_counter() - start, settled=0, queries=len(node_pairs))
+        return [RouteLeg(u, v, distance, tuple(path)) for (u, v), distance, path in zip(node_pairs, distances, paths)]
+    graph = _require_graph()
+    groups = {}
+    for u, v in node_pairs:
+        groups.setdefault(u, []).append(v)
+    legs = []
+    for origin, dests in groups.items():
+        source = graph.index_of([origin]).item()
+        distances, paths = graph.shortest_paths(source, graph.index_of(dests), weight)
+        for dest, distance, path in zip(dests, distances.tolist(), paths):
+            nodes = tuple(graph.node_ids[path].tolist()) if path is not None else ()
+            legs.append(RouteLeg(origin, dest, distance, nodes))
+    _stats.record_query(weight, "dijkstra", time.perf_counter() - start, queries=len(node_pairs))
+    return legs
+
+def route_coords(leg: RouteLeg) -> np.ndarray:
+    """(lat, lon) of every graph node along a leg with geometry, needs the local graph."""
+    graph = _require_graph()
+    if not leg.nodes:
+        return np.empty((0, 2))
+    return graph.coords[graph.index_of(list(leg.nodes))]
+
+def configure_route_cache(maxsize: int) -> None:
+    """Resize the shared route leg cache, 0 disables it."""
+    _route_cache.resize(maxsize)
+
+def clear_route_cache(weight: Optional[str] = None) -> None:
+    _route_cache.clear(weight)
+
+def route_cache_stats() -> dict:
+    return _route_cache.stats()
+
+def routing_stats() -> dict:
+    """Routing counters since the last reset, together with the distance and route cache statistics."""
+    data = _stats.to_dict()
+    data["distance_cache"] = _distance_cache.stats()
+    data["route_cache"] = _route_cache.stats()
+    return data
+
+def reset_routing_stats() -> None:
+    """Zero the routing counters and the hit/miss counts of the distance and route caches; cached entries are kept."""
+    _stats.reset()
+    _distance_cache.reset_stats()
+    _route_cache.reset_stats()
+
+def enable_routing_stats(enabled: bool = True) -> None:
+    _stats.enabled = enabled
+
+def dump_routing_stats(path: str) -> dict:
+    """Write routing_stats() to a JSON file."""
+    return _stats.dump(path, extra={"distance_cache": _distance_cache.stats(), "route_cache": _route_cache.stats()})
+
+def _location_of(item):
+    """Nodes, warehouses and plain Locations are all accepted as query points."""
+    return getattr(item, "location", item)
+
+def iter_nearest_by_road(origin, candidates: Iterable, max_dist: float = math.inf,
+                         weight: str = "length") -> Iterator[tuple]:
+    """
+    Yield (distance, candidate) in increasing road distance from origin.
+    Runs one Dijkstra from the origin that settles nodes lazily, so a caller
+    that stops after the first few candidates never pays for the rest.
+    Candidates further than max_dist are not yielded. Without a radius,
+    unreachable candidates come last with an infinite distance.
+    """
+    client = remote_client()
+    graph = _require_graph() if client is None else None
+    candidates = list(candidates)
+    if not candidates:
+        return
+    orig_node = _location_of(origin).get_node()
+    cand_nodes = [_location_of(candidate).get_node() for candidate in candidates]
+
+    start = time.perf_counter()
+    for matrix in _distance_matrices:
+        if matrix.weight != weight:
+            continue
+        distances = matrix.row(orig_node, cand_nodes)
+        if distances is None:
+            continue
+        _stats.record_query(weight, "matrix", time.perf_counter() - start, queries=len(candidates))
+        yield from _by_distance(distances, candidates, max_dist)
+        return
+    if client is not None:
+        distances = client.matrix([orig_node], cand_nodes, weight)[0]
+        _stats.record_query(weight, "service", time.perf_counter() - start, settled=0, queries=len(candidates))
+        yield from _by_distance(distances, candidates, max_dist)
+        return
+
+    # only time spent searching counts, not the caller's work between candidates
+    busy = 0.0
+    running_since = start
+    settled = 0
+    try:
+        waiting = {}
+        for candidate, index in zip(candidates, graph.index_of(cand_nodes).tolist()):
+            waiting.setdefault(index, []).append(candidate)
+        source = graph.index_of([orig_node]).item()
+        adj = graph.adjacency(weight)
+        dist = {source: 0.0}
+        heap = [(0.0, source)]
+        while heap and waiting:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            if d > max_dist:
+                return
+            settled += 1
+            for candidate in waiting.pop(u, ()):
+                busy += time.perf_counter() - running_since
+                running_since = None
+                yield d, candidate
+                running_since = time.perf_counter()
+            for v, w in adj[u]:
+                nd = d + w
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        busy += time.perf_counter() - running_since
+        running_since = None
+        if max_dist == math.inf:
+            for remaining in waiting.values():
+                for candidate in remaining:
+                    yield math.inf, candidate
+    finally:
+        if running_since is not None:
+            busy += time.perf_counter() - running_since
+        _stats.record_query(weight, "nearest", busy, settled=settled)
+
+def _by_distance(distances: np.ndarray, candidates: list, max_dist: float) -> Iterator[tuple]:
+    for i in np.argsort(distances, kind="stable").tolist():
+        if distances[i] > max_dist:
+            return
+        yield float(distances[i]), candidates[i]
+
+def k_nearest_by_road(origin, candidates: Iterable, k: int, max_dist: float = math.inf,
+                      weight: str = "length") -> List[tuple]:
+    """The k candidates closest to origin by road as sorted (distance, candidate) pairs."""
+    return list(islice(iter_nearest_by_road(origin, candidates, max_dist=max_dist, weight=weight), k))
 
 def get_bounding_box(center_point: tuple[float, float], dist: float = 5000) -> dict:
     """Get bounding box coordinates for a given center point and distance."""
-    if _gu is None:
-        raise RuntimeError("Graph not initialized. Call init_graph first.")
+    _require_graph()
 
     longmin, latmin, longmax, latmax = ox.utils_geo.bbox_from_point(center_point, dist=dist)
     newprint.newprint(f"Bounding box: {longmin}, {latmin}, {longmax}, {latmax}")
@@ -40,7 +824,7 @@ def get_bounding_box(center_point: tuple[float, float], dist: float = 5000) -> d
         "longitude":[longmin, longmax]
     }
 
-def initialize_adaptive_edges(G, default_speed_mps=13.9):
+def initialize_adaptive_edges(G, default_speed_mps=DEFAULT_SPEED_MPS):
     for u, v, data in G.edges(data=True):
 
         length = data.get("length", 100.0)  # meters
@@ -3,6 +3,8 @@ from .node import Node
 from typing import List,Optional
 
 class Cluster:
+    __slots__ = ("nodes","sinks","sources","size","inventory")
+
     def __init__(self,nodes:Optional[List[Node]]):
         self.nodes = nodes if nodes else []
         self.sinks = [node for node in nodes if not node.is_source]
@@ -42,6 +44,12 @@ class Cluster:
         return self.size
     
     def updateinventory(self):
+        nodes = self.sources + self.sinks
+        store = nodes[0].store if nodes else None
+        if store is not None and all(store.owns(node) for node in nodes):
+            # summed on the store's columns
+            self.inventory = store.inventory([node.id for node in nodes])
+            return
         self.inventory = defaultdict(int)
         for node in self.sources:
             self.inventory[node.item] += node.value
@@ -1,3 +1,5 @@
+import os
+
 import numpy as np
 
 class Constants:
@@ -5,4 +7,28 @@ class Constants:
     DEFAULT_LATMIN = np.float64(10.946377767208045)
     DEFAULT_LATMAX = np.float64(11.036309800757333)
     DEFAULT_LONGMIN = np.float64(76.95862068542934)
-    DEFAULT_LONGMAX = np.float64(77.05023326008785)
\ No newline at end of file
+    DEFAULT_LONGMAX = np.float64(77.05023326008785)
+    # Anchored to the project root so runs from Driver_Code/ or road-microservice/ share it
+    GRAPH_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".graph_cache")
+    DISTANCE_CACHE_SIZE = 200000
+    # Tiled road graphs, see tilestore.TileStore
+    TILE_SIZE_M = 5000
+    TILE_OVERLAP_M = 1000
+    MAX_LOADED_TILES = 16
+    # road-microservice/server.py and the RoadClient talking to it
+    ROAD_SERVICE_HOST = "127.0.0.1"
+    ROAD_SERVICE_PORT = 8765
+    ROAD_SERVICE_BATCH = 5000
+    # Threads road_distances spreads routing service requests over
+    ROUTING_WORKERS = 4
+    # Cell size of the approximate distance oracle, see distanceoracle.GridOracle
+    ORACLE_CELL_M = 500
+    # Route legs shared between paths, see OSMRouter.route_legs
+    ROUTE_CACHE_SIZE = 50000
+    # Simulation.populate_nodes hotspots: default spread and share of nodes placed around them
+    HOTSPOT_RADIUS_M = 500
+    HOTSPOT_SHARE = 0.8
+    # Batched queries use point-to-point searches for origins with at most this many destinations
+    POINT_SEARCH_LIMIT = 8
+    # Plain point searches on length first settle only nodes within this multiple of the straight-line distance
+    POINT_SEARCH_DETOUR = 2.0
\ No newline at end of file
@@ -0,0 +1,226 @@
+import heapq
+import math
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .routinggraph import RoutingGraph
+
+# Witness searches give up after settling this many nodes. A search that gives
+# up early only costs an unnecessary shortcut, never a wrong distance.
+WITNESS_SETTLE_LIMIT = 60
+
+
+def _witness_search(adj: List[Dict[int, float]], source: int, exclude: int,
+                    targets: set, max_dist: float) -> Dict[int, float]:
+    """Bounded Dijkstra from source that never passes through exclude."""
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    remaining = set(targets)
+    settled = 0
+    while heap and remaining:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        if d > max_dist or settled >= WITNESS_SETTLE_LIMIT:
+            break
+        remaining.discard(u)
+        settled += 1
+        for v, w in adj[u].items():
+            if v == exclude:
+                continue
+            nd = d + w
+            if nd < dist.get(v, math.inf):
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return dist
+
+
+def _shortcuts(adj: List[Dict[int, float]], v: int) -> list:
+    """Shortcuts (u, x, weight) needed to keep distances exact once v is removed."""
+    neighbours = list(adj[v].items())
+    shortcuts = []
+    for i, (u, wu) in enumerate(neighbours[:-1]):
+        targets = neighbours[i + 1:]
+        max_dist = wu + max(w for _, w in targets)
+        dist = _witness_search(adj, u, v, {x for x, _ in targets}, max_dist)
+        for x, wx in targets:
+            via = wu + wx
+            if dist.get(x, math.inf) > via:
+                shortcuts.append((u, x, via))
+    return shortcuts
+
+
+class ContractionHierarchy:
+    """
+    Contraction hierarchy over one weight of a RoutingGraph.
+    Nodes are contracted in order of edge difference, adding shortcuts so
+    distances are preserved. A query is a bidirectional search that only
+    follows edges towards higher ranked nodes. The road graph is undirected,
+    so one upward graph serves both directions.
+    """
+
+    def __init__(self, rank: np.ndarray, up_indptr: np.ndarray, up_indices: np.ndarray,
+                 up_weights: np.ndarray, weight: str, fingerprint: str):
+        self.rank = rank
+        self.up_indptr = up_indptr
+        self.up_indices = up_indices
+        self.up_weights = up_weights
+        self.weight = weight
+        self.fingerprint = fingerprint
+        # nodes popped by the last query(); shared by every caller, so
+        # concurrent code should take the count search() returns instead
+        self.last_settled = 0
+        # python lists are much faster than numpy scalars inside the search loop
+        indices = up_indices.tolist()
+        weights = up_weights.tolist()
+        bounds = up_indptr.tolist()
+        self.up = [list(zip(indices[bounds[i]:bounds[i + 1]], weights[bounds[i]:bounds[i + 1]]))
+                   for i in range(len(rank))]
+
+    @classmethod
+    def build(cls, graph: RoutingGraph, weight: str = "length") -> "ContractionHierarchy":
+        n = len(graph)
+        weights = graph.weight_array(weight).tolist()
+        indices = graph.indices.tolist()
+        indptr = graph.indptr.tolist()
+        adj: List[Dict[int, float]] = [
+            {indices[j]: weights[j] for j in range(indptr[u], indptr[u + 1])} for u in range(n)
+        ]
+
+        deleted = [0] * n
+        depth = [0] * n
+        rank = np.full(n, -1, dtype=np.int64)
+        up: List[Dict[int, float]] = [None] * n
+
+        def priority(v: int) -> int:
+            return len(_shortcuts(adj, v)) - len(adj[v]) + deleted[v] + depth[v]
+
+        heap = [(priority(v), v) for v in range(n)]
+        heapq.heapify(heap)
+        order = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            if rank[v] >= 0:
+                continue
+            # lazy update: re-evaluate and put back if it is no longer the cheapest
+            current = priority(v)
+            if heap and current > heap[0][0]:
+                heapq.heappush(heap, (current, v))
+                continue
+            for u, x, via in _shortcuts(adj, v):
+                if via < adj[u].get(x, math.inf):
+                    adj[u][x] = via
+                    adj[x][u] = via
+            up[v] = adj[v]
+            for u in adj[v]:
+                del adj[u][v]
+                deleted[u] += 1
+                depth[u] = max(depth[u], depth[v] + 1)
+            adj[v] = {}
+            rank[v] = order
+            order += 1
+
+        up_indptr = np.zeros(n + 1, dtype=np.int64)
+        up_indptr[1:] = np.cumsum([len(edges) for edges in up])
+        up_indices = np.fromiter((u for edges in up for u in edges), dtype=np.int32, count=up_indptr[-1])
+        up_weights = np.fromiter((w for edges in up for w in edges.values()), dtype=np.float64, count=up_indptr[-1])
+        return cls(rank, up_indptr, up_indices, up_weights, weight, graph.fingerprint(weight))
+
+    @property
+    def num_shortcuts(self) -> int:
+        return len(self.up_indices)
+
+    def _search_step(self, heap, dist, other, best):
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            return best
+        if u in other:
+            best = min(best, d + other[u])
+        edges = self.up[u]
+        # stall-on-demand: a higher node already reached more cheaply proves
+        # d is not a shortest distance, so nothing found from u can be either
+        for v, w in edges:
+            if dist.get(v, math.inf) + w < d:
+                return best
+        for v, w in edges:
+            nd = d + w
+            if nd < dist.get(v, math.inf):
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+        return best
+
+    def query(self, source: int, target: int) -> float:
+        """Exact shortest distance between two compact node indices."""
+        distance, self.last_settled = self.search(source, target)
+        return distance
+
+    def search(self, source: int, target: int) -> Tuple[float, int]:
+        """query() that also returns the number of nodes it settled, as (distance, settled)."""
+        if source == target:
+            return 0.0, 0
+        settled = 0
+        forward = {source: 0.0}
+        backward = {target: 0.0}
+        forward_heap = [(0.0, source)]
+        backward_heap = [(0.0, target)]
+        best = math.inf
+        while True:
+            forward_open = bool(forward_heap) and forward_heap[0][0] < best
+            backward_open = bool(backward_heap) and backward_heap[0][0] < best
+            if not forward_open and not backward_open:
+                break
+            if forward_open:
+                best = self._search_step(forward_heap, forward, backward, best)
+                settled += 1
+            if backward_open:
+                best = self._search_step(backward_heap, backward, forward, best)
+                settled += 1
+        return best, settled
+
+    def validate(self, graph: RoutingGraph, pairs: int = 100, seed: int = 0, tolerance: float = 1e-6) -> dict:
+        """Compare query() against plain Dijkstra on random node pairs."""
+        rng = random.Random(seed)
+        n = len(graph)
+        mismatches = []
+        ch_time = 0.0
+        dijkstra_time = 0.0
+        for _ in range(pairs):
+            source, target = rng.randrange(n), rng.randrange(n)
+            start = time.perf_counter()
+            expected = graph.distance(source, target, self.weight)
+            dijkstra_time += time.perf_counter() - start
+            start = time.perf_counter()
+            found = self.query(source, target)
+            ch_time += time.perf_counter() - start
+            if not (found == expected or abs(found - expected) <= tolerance):
+                mismatches.append((source, target, expected, found))
+        return {
+            "pairs": pairs,
+            "mismatches": mismatches,
+            "ch_avg_ms": ch_time / pairs * 1000,
+            "dijkstra_avg_ms": dijkstra_time / pairs * 1000,
+        }
+
+    def save(self, file) -> None:
+        np.savez(file, rank=self.rank, up_indptr=self.up_indptr, up_indices=self.up_indices,
+                 up_weights=self.up_weights, weight=np.array(self.weight), fingerprint=np.array(self.fingerprint))
+
+    @classmethod
+    def load(cls, file) -> "ContractionHierarchy":
+        with np.load(file) as data:
+            return cls(data["rank"], data["up_indptr"], data["up_indices"], data["up_weights"],
+                       str(data["weight"]), str(data["fingerprint"]))
+
+    @classmethod
+    def load_for(cls, path: str, graph: RoutingGraph, weight: str) -> Optional["ContractionHierarchy"]:
+        """Load a persisted hierarchy, or None if it is missing or was built for other weights."""
+        try:
+            hierarchy = cls.load(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        if hierarchy.weight != weight or hierarchy.fingerprint != graph.fingerprint(weight):
+            return None
+        return hierarchy
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+from typing import Optional
+
+
+class DistanceCache:
+    """
+    Bounded LRU cache of road distances keyed on (snapped origin, snapped destination, weight).
+    The road graph is undirected, so (a, b) and (b, a) share one entry.
+    """
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(orig_node, dest_node, weight: str) -> tuple:
+        if orig_node <= dest_node:
+            return (orig_node, dest_node, weight)
+        return (dest_node, orig_node, weight)
+
+    def get(self, orig_node, dest_node, weight: str) -> Optional[float]:
+        key = self.key(orig_node, dest_node, weight)
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, orig_node, dest_node, weight: str, value: float) -> None:
+        if self.maxsize <= 0:
+            return
+        key = self.key(orig_node, dest_node, weight)
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        self.evict()
+
+    def evict(self) -> None:
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def resize(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.evict()
+
+    def clear(self, weight: Optional[str] = None) -> None:
+        """Drop every entry, or only the entries of one weight."""
+        if weight is None:
+            self.entries.clear()
+            return
+        for key in [key for key in self.entries if key[2] == weight]:
+            del self.entries[key]
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
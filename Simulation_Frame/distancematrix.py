@@ -0,0 +1,203 @@
+import hashlib
+import multiprocessing
+import sys
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from .node import Node
+from . import OSMRouter
+from .graphcache import matrix_cache_path, load_cached_matrix, save_cached_matrix, remove_stale_matrices
+
+# Origins are searched in blocks so the intermediate (origins x graph nodes)
+# array stays small on large graphs.
+ORIGIN_BLOCK = 256
+
+# Per worker process: shared arrays attached once by _init_worker
+_worker = {}
+
+
+def _share(arrays: Dict[str, np.ndarray], segments: list) -> Dict[str, tuple]:
+    """Copy arrays into new shared memory segments, return what workers need to attach them."""
+    specs = {}
+    for name, arr in arrays.items():
+        segment = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        segments.append(segment)
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=segment.buf)[...] = arr
+        specs[name] = (segment.name, arr.shape, arr.dtype.str)
+    return specs
+
+
+def _pool_context():
+    """
+    fork on Linux, where workers start from the parent's memory without
+    importing anything. Elsewhere spawn, the platform default: the calling
+    script must then keep its top level behind an `if __name__ == "__main__":`
+    guard, since every worker imports it again.
+    """
+    if sys.platform.startswith("linux"):
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("spawn")
+
+
+def _init_worker(specs: Dict[str, tuple]) -> None:
+    for name, (segment_name, shape, dtype) in specs.items():
+        # pool workers share the parent's resource tracker, which unlinks the
+        # segments only once the parent does in _compute_parallel
+        segment = shared_memory.SharedMemory(name=segment_name)
+        _worker[f"{name}_segment"] = segment
+        _worker[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+    n = len(_worker["indptr"]) - 1
+    _worker["csr"] = csr_matrix((_worker["weights"], _worker["indices"], _worker["indptr"]), shape=(n, n), copy=False)
+
+
+def _solve_block(bounds: tuple) -> None:
+    start, stop = bounds
+    dist = dijkstra(_worker["csr"], directed=True, indices=_worker["origins"][start:stop])
+    _worker["out"][start:stop] = dist[:, _worker["targets"]]
+
+
+class DistanceMatrix:
+    """
+    Road distances between simulation nodes, computed with one single-source
+    search per distinct origin over the compact routing graph instead of one
+    search per pair.
+    `matrix[i, j]` is the distance from sources[i] to sinks[j]; when sinks is
+    omitted it is the full N x N matrix over sources.
+    """
+
+    def __init__(self, sources: List[Node], sinks: Optional[List[Node]] = None, weight: str = "length"):
+        self.sources = list(sources)
+        self.sinks = list(sinks) if sinks is not None else self.sources
+        self.weight = weight
+        self.graph_version = None
+        self.table = None
+        self.rows = None
+        self.cols = None
+        self.row_of = {}
+        self.col_of = {}
+
+    def compute(self, workers: int = 1, persist: bool = True) -> "DistanceMatrix":
+        """
+        workers > 1 fans origin blocks out to a process pool. The graph arrays and
+        the output table live in shared memory, so nothing graph sized is pickled.
+        persist stores the table in the graph cache directory, keyed by the graph
+        fingerprint and the snapped nodes. Later runs memory map it read-only
+        instead of searching again.
+        """
+        locations = [node.location for node in self.sources + self.sinks]
+        OSMRouter.snap_locations(location for location in locations if location.snap is None)
+
+        source_nodes = [node.location.get_node() for node in self.sources]
+        sink_nodes = [node.location.get_node() for node in self.sinks]
+        unique_sources = list(dict.fromkeys(source_nodes))
+        unique_sinks = list(dict.fromkeys(sink_nodes))
+        self.row_of = {node: i for i, node in enumerate(unique_sources)}
+        self.col_of = {node: i for i, node in enumerate(unique_sinks)}
+        self.rows = np.array([self.row_of[node] for node in source_nodes], dtype=np.int64)
+        self.cols = np.array([self.col_of[node] for node in sink_nodes], dtype=np.int64)
+
+        self.graph_version = OSMRouter.graph_version()
+        client = OSMRouter.remote_client()
+        if client is not None:
+            self.table = client.matrix(unique_sources, unique_sinks, self.weight)
+            return self
+
+        graph = OSMRouter.get_routing_graph()
+        origins = graph.index_of(unique_sources)
+        targets = graph.index_of(unique_sinks)
+
+        path = self._cache_path(graph, unique_sources, unique_sinks) if persist else None
+        if path:
+            table = load_cached_matrix(path)
+            if table is not None and table.shape == (len(origins), len(targets)):
+                self.table = table
+                return self
+
+        if workers > 1 and len(origins) > 1:
+            self.table = self._compute_parallel(graph, origins, targets, workers)
+        else:
+            self.table = np.empty((len(origins), len(targets)), dtype=np.float64)
+            for start in range(0, len(origins), ORIGIN_BLOCK):
+                block = origins[start:start + ORIGIN_BLOCK]
+                dist = graph.distances_from(block, self.weight)
+                self.table[start:start + len(block)] = dist[:, targets]
+        if path:
+            save_cached_matrix(self.table, path)
+        return self
+
+    def _cache_path(self, graph, unique_sources: list, unique_sinks: list) -> Optional[str]:
+        key, cache_dir = OSMRouter.cache_location()
+        if not cache_dir:
+            return None
+        fingerprint = graph.fingerprint(self.weight)
+        remove_stale_matrices(key, cache_dir, self.weight, fingerprint)
+        digest = hashlib.sha1()
+        digest.update(np.asarray(unique_sources, dtype=graph.node_ids.dtype).tobytes())
+        digest.update(b"|")
+        digest.update(np.asarray(unique_sinks, dtype=graph.node_ids.dtype).tobytes())
+        return matrix_cache_path(key, cache_dir, self.weight, fingerprint, digest.hexdigest()[:16])
+
+    def _compute_parallel(self, graph, origins: np.ndarray, targets: np.ndarray, workers: int) -> np.ndarray:
+        segments = []
+        try:
+            specs = _share({
+                "indptr": graph.indptr,
+                "indices": graph.indices,
+                "weights": graph.weight_array(self.weight),
+                "origins": origins,
+                "targets": targets,
+                "out": np.empty((len(origins), len(targets)), dtype=np.float64),
+            }, segments)
+            # a few blocks per worker keeps them busy when some origins are slower
+            block = max(1, min(ORIGIN_BLOCK, -(-len(origins) // (workers * 4))))
+            bounds = [(start, min(start + block, len(origins))) for start in range(0, len(origins), block)]
+            with _pool_context().Pool(workers, initializer=_init_worker, initargs=(specs,)) as pool:
+                pool.map(_solve_block, bounds)
+            _, shape, dtype = specs["out"]
+            return np.ndarray(shape, dtype=np.dtype(dtype), buffer=segments[-1].buf).copy()
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Distances indexed by node position in sources and sinks."""
+        return self.table[np.ix_(self.rows, self.cols)]
+
+    def get(self, source: Node, sink: Node) -> float:
+        found = self.lookup(source.location.get_node(), sink.location.get_node())
+        if found is None:
+            return source.location.get_distance(sink.location, heuristic=self.weight)
+        return found
+
+    def lookup(self, orig_node, dest_node) -> Optional[float]:
+        """Distance between two graph nodes if this matrix covers them, otherwise None."""
+        if self.graph_version != OSMRouter.graph_version():
+            return None
+        row = self.row_of.get(orig_node)
+        col = self.col_of.get(dest_node)
+        if row is not None and col is not None:
+            return float(self.table[row, col])
+        # the road graph is undirected, so the reverse pair answers too
+        row = self.row_of.get(dest_node)
+        col = self.col_of.get(orig_node)
+        if row is not None and col is not None:
+            return float(self.table[row, col])
+        return None
+
+    def row(self, orig_node, dest_nodes: list) -> Optional[np.ndarray]:
+        """Distances from one graph node to several, if this matrix covers all of them."""
+        if self.graph_version != OSMRouter.graph_version():
+            return None
+        row = self.row_of.get(orig_node)
+        if row is not None and all(node in self.col_of for node in dest_nodes):
+            return self.table[row, [self.col_of[node] for node in dest_nodes]]
+        col = self.col_of.get(orig_node)
+        if col is not None and all(node in self.row_of for node in dest_nodes):
+            return self.table[[self.row_of[node] for node in dest_nodes], col]
+        return None
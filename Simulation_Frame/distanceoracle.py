@@ -0,0 +1,89 @@
+import math
+from typing import Tuple
+
+import numpy as np
+
+from .routinggraph import RoutingGraph
+
+# Representatives searched per Dijkstra call while building the table
+REPRESENTATIVE_BLOCK = 64
+
+
+class GridOracle:
+    """
+    Approximate road distances from a cell-to-cell table.
+    Graph nodes are bucketed into square cells of cell_m meters. Every
+    non-empty cell has a representative node (the one nearest its centre) and
+    the table holds road distances between representatives. Each node keeps
+    r(u), its road distance to its own cell's representative.
+
+    For nodes u and v the estimate is table[cell(u), cell(v)], and by the
+    triangle inequality on the undirected graph
+        |d(u, v) - estimate| <= r(u) + r(v)
+    so every answer comes with its own error bound.
+    """
+
+    def __init__(self, cell_of: np.ndarray, radius: np.ndarray, table: np.ndarray,
+                 representatives: np.ndarray, weight: str, fingerprint: str, cell_m: float):
+        self.cell_of = cell_of
+        self.radius = radius
+        self.table = table
+        self.representatives = representatives
+        self.weight = weight
+        self.fingerprint = fingerprint
+        self.cell_m = cell_m
+
+    @classmethod
+    def build(cls, graph: RoutingGraph, weight: str = "length", cell_m: float = 500.0) -> "GridOracle":
+        xy = graph.xy
+        cells = np.floor((xy - xy.min(axis=0)) / cell_m).astype(np.int64)
+        _, cell_of = np.unique(cells[:, 0] * (cells[:, 1].max() + 1) + cells[:, 1], return_inverse=True)
+        cell_of = cell_of.reshape(-1)
+        num_cells = int(cell_of.max()) + 1 if len(cell_of) else 0
+
+        # representative: node closest to the centre of its cell
+        centre = (cells + 0.5) * cell_m + xy.min(axis=0)
+        offset = np.hypot(*(xy - centre).T)
+        order = np.lexsort((offset, cell_of))
+        first = np.r_[True, cell_of[order][1:] != cell_of[order][:-1]]
+        representatives = order[first]
+
+        table = np.empty((num_cells, num_cells), dtype=np.float64)
+        radius = np.empty(len(graph), dtype=np.float64)
+        for start in range(0, num_cells, REPRESENTATIVE_BLOCK):
+            block = np.arange(start, min(start + REPRESENTATIVE_BLOCK, num_cells))
+            dist = graph.distances_from(representatives[block], weight)
+            table[block] = dist[:, representatives]
+            members = np.flatnonzero((cell_of >= block[0]) & (cell_of <= block[-1]))
+            radius[members] = dist[cell_of[members] - block[0], members]
+        return cls(cell_of, radius, table, representatives, weight, graph.fingerprint(weight), cell_m)
+
+    @property
+    def max_radius(self) -> float:
+        finite = self.radius[np.isfinite(self.radius)]
+        return float(finite.max()) if len(finite) else 0.0
+
+    def estimate(self, u: int, v: int) -> Tuple[float, float]:
+        """(estimate, error bound) between two compact node indices."""
+        if u == v:
+            return 0.0, 0.0
+        bound = self.radius[u] + self.radius[v]
+        return float(self.table[self.cell_of[u], self.cell_of[v]]), float(bound)
+
+    def estimate_many(self, u: int, targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Estimates and error bounds from one compact node index to many."""
+        targets = np.asarray(targets, dtype=np.int64)
+        estimates = self.table[self.cell_of[u], self.cell_of[targets]]
+        bounds = self.radius[u] + self.radius[targets]
+        same = targets == u
+        estimates = np.where(same, 0.0, estimates)
+        bounds = np.where(same, 0.0, bounds)
+        return estimates, bounds
+
+    def lower_upper(self, u: int, targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Interval [lower, upper] the exact distance is guaranteed to lie in."""
+        estimates, bounds = self.estimate_many(u, targets)
+        lower = np.maximum(estimates - bounds, 0.0)
+        lower = np.where(np.isnan(lower), 0.0, lower)
+        upper = np.where(np.isnan(estimates + bounds), math.inf, estimates + bounds)
+        return lower, upper
@@ -5,6 +5,8 @@ from .location import Location
 from typing import Optional
 
 class Driver:
+    __slots__ = ("capacity","inventory","location")
+
     def __init__(self,capacity,location:Optional[Location]=None):
         self.capacity = capacity
         self.inventory = Inventory()
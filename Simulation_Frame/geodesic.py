@@ -0,0 +1,78 @@
+from typing import Iterable, Optional
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000.0
+
+
+def latlon_array(locations: Iterable) -> np.ndarray:
+    """(n, 2) array of (lat, lon) for Location objects, in Location.latlon order."""
+    return np.array([location.latlon() for location in locations], dtype=np.float64).reshape(-1, 2)
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in meters. Arguments broadcast, so scalars give one
+    pair, equal length arrays give pairwise distances and a scalar against
+    arrays gives one-to-many.
+    """
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = np.radians(np.subtract(lon2, lon1))
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def equirectangular(lat1, lon1, lat2, lon2):
+    """
+    Flat earth approximation of haversine, broadcasting the same way. Within a
+    city sized area it is off by well under a percent and a lot cheaper.
+    """
+    mean_phi = np.radians(np.add(lat1, lat2) / 2)
+    x = np.radians(np.subtract(lon2, lon1)) * np.cos(mean_phi)
+    y = np.radians(np.subtract(lat2, lat1))
+    return EARTH_RADIUS_M * np.hypot(x, y)
+
+
+def haversine_matrix(a: np.ndarray, b: Optional[np.ndarray] = None) -> np.ndarray:
+    """Many-to-many great-circle distances between (n, 2) and (m, 2) (lat, lon) arrays, shape (n, m)."""
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 2)
+    b = a if b is None else np.asarray(b, dtype=np.float64).reshape(-1, 2)
+    return haversine(a[:, None, 0], a[:, None, 1], b[None, :, 0], b[None, :, 1])
+
+
+def equirectangular_matrix(a: np.ndarray, b: Optional[np.ndarray] = None) -> np.ndarray:
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 2)
+    b = a if b is None else np.asarray(b, dtype=np.float64).reshape(-1, 2)
+    return equirectangular(a[:, None, 0], a[:, None, 1], b[None, :, 0], b[None, :, 1])
+
+
+def project(coords: np.ndarray, origin: Optional[tuple] = None) -> np.ndarray:
+    """
+    Equirectangular projection of (lat, lon) rows to local (x, y) meters around
+    origin (defaults to the mean position), so euclidean distance on the result
+    approximates ground distance.
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    if origin is None:
+        origin = coords.mean(axis=0) if len(coords) else (0.0, 0.0)
+    lat0, lon0 = origin
+    x = np.radians(coords[:, 1] - lon0) * np.cos(np.radians(lat0)) * EARTH_RADIUS_M
+    y = np.radians(coords[:, 0] - lat0) * EARTH_RADIUS_M
+    return np.column_stack((x, y))
+
+
+def projection_safety(coords: np.ndarray, origin: tuple, margin: float = 1e-3) -> float:
+    """
+    Factor at most 1 that keeps projected distances at or below great-circle
+    distances for points within the latitudes of coords. project() keeps the
+    east-west scale of the origin latitude, which overstates distances further
+    from the equator; the margin covers the curvature a plane ignores.
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    if not len(coords):
+        return 1.0 - margin
+    farthest = np.radians(np.abs(coords[:, 0]).max())
+    scale = min(1.0, np.cos(farthest) / np.cos(np.radians(origin[0])))
+    return float(scale * (1.0 - margin))
@@ -0,0 +1,132 @@
+import hashlib
+import os
+import pickle
+from typing import Optional
+
+import networkx as nx
+import numpy as np
+
+from .routinggraph import RoutingGraph
+
+# Bump whenever the processing done in OSMRouter.init_graph changes so old
+# cache entries stop matching.
+GRAPH_CACHE_VERSION = 1
+
+
+def graph_cache_key(center_point: tuple[float, float], dist: float, network_type: str,
+                    options: Optional[dict] = None, source: Optional[str] = None) -> str:
+    """
+    Stable key for a processed road graph.
+    center_point is rounded to ~1cm so float noise does not split the cache.
+    source identifies a local GraphML file (path, size and mtime) when the
+    graph is not downloaded.
+    """
+    lat, lon = center_point
+    parts = [
+        f"v{GRAPH_CACHE_VERSION}",
+        f"{round(float(lat), 7)}",
+        f"{round(float(lon), 7)}",
+        f"{float(dist)}",
+        network_type,
+    ]
+    for name in sorted(options or {}):
+        parts.append(f"{name}={options[name]}")
+    if source:
+        stat = os.stat(source)
+        parts.append(f"{os.path.abspath(source)}:{stat.st_size}:{int(stat.st_mtime)}")
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+
+def graph_cache_path(key: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, f"graph-{key}.pkl")
+
+
+def routing_graph_cache_path(key: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, f"graph-{key}.npz")
+
+
+def hierarchy_cache_path(key: str, cache_dir: str, weight: str) -> str:
+    return os.path.join(cache_dir, f"graph-{key}-ch-{weight}.npz")
+
+
+def matrix_cache_path(key: str, cache_dir: str, weight: str, fingerprint: str, nodes_hash: str) -> str:
+    return os.path.join(cache_dir, f"graph-{key}-matrix-{weight}-{fingerprint}-{nodes_hash}.npy")
+
+
+def load_cached_graph(key: str, cache_dir: str) -> Optional[nx.MultiGraph]:
+    """Return the cached graph for key, or None if it is missing or unreadable."""
+    path = graph_cache_path(key, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+
+
+def save_cached_graph(G: nx.MultiGraph, key: str, cache_dir: str) -> str:
+    """Pickle G into the cache. Writes to a temp file first so readers never see a partial file."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = graph_cache_path(key, cache_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(G, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_cached_routing_graph(key: str, cache_dir: str) -> Optional[RoutingGraph]:
+    """Return the cached compact routing graph for key, or None if it is missing or unreadable."""
+    path = routing_graph_cache_path(key, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        return RoutingGraph.load(path)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_cached_routing_graph(graph: RoutingGraph, key: str, cache_dir: str) -> str:
+    os.makedirs(cache_dir, exist_ok=True)
+    path = routing_graph_cache_path(key, cache_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        graph.save(f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_cached_matrix(path: str) -> Optional[np.ndarray]:
+    """Open a persisted distance table read-only and memory mapped, or None if it is missing or unreadable."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached_matrix(table: np.ndarray, path: str) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, table)
+    os.replace(tmp_path, path)
+    return path
+
+
+def remove_stale_matrices(key: str, cache_dir: str, weight: str, fingerprint: str) -> int:
+    """Delete distance tables of this graph and weight computed under other edge weights."""
+    prefix = f"graph-{key}-matrix-{weight}-"
+    removed = 0
+    if not os.path.isdir(cache_dir):
+        return removed
+    for name in os.listdir(cache_dir):
+        if name.startswith(prefix) and name.endswith(".npy") and not name.startswith(f"{prefix}{fingerprint}-"):
+            try:
+                os.remove(os.path.join(cache_dir, name))
+                removed += 1
+            except OSError:
+                pass
+    return removed
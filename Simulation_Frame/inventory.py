@@ -4,9 +4,12 @@ from Simulation_Frame.node import Node
 
 
 class Inventory:
+    __slots__ = ("inventory","weights","weight")
+
     def __init__(self):
         self.inventory = defaultdict(int)
-        self.weights = defaultdict(lambda: 1)
+        # weight per item, items never given one weigh 1
+        self.weights = {}
         self.weight = 0
     
     def add_node(self,node:Node,weight=None):
@@ -31,7 +34,8 @@ class Inventory:
         if not self.inventory[item] >= value:
             raise ValueError(f"Removing more of {item} than what is present (Tried to remove f{value})")
         self.inventory[item] -= value
-        weight = self.weights[item]
+        # remembered like a first add_item of the item would
+        weight = self.weights.setdefault(item,1)
         amount = value*weight
         self.weight -= amount
 
@@ -39,9 +43,7 @@ class Inventory:
         return self.inventory[item]
     
     def get_item_weight(self,item):
-        if item in self.weights.keys():
-            return self.weights[item]
-        return 1
+        return self.weights.get(item,1)
 
     def is_empty(self):
         for item in self.get_items():
@@ -0,0 +1,75 @@
+import math
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class ItemIndex:
+    """
+    Unsatisfied rows of a NodeStore grouped by (item code, is_source). Each
+    group is a list of (|value|, id) keys kept in ascending order, so "sinks of
+    item X with |value| <= k" is a bisect and a slice. The store keeps the
+    index current as values, items, source flags and satisfaction change.
+    """
+
+    def __init__(self):
+        self.groups: Dict[Tuple[int, bool], List[Tuple]] = {}
+
+    @classmethod
+    def build(cls, store) -> "ItemIndex":
+        index = cls()
+        ids = np.flatnonzero(~store.satisfied)
+        codes = store.item[ids]
+        is_source = store.is_source[ids]
+        amounts = np.abs(store.value[ids])
+        order = np.lexsort((ids, amounts, is_source, codes))
+        ids, codes, is_source, amounts = ids[order], codes[order], is_source[order], amounts[order]
+        if len(ids) == 0:
+            return index
+        starts = np.flatnonzero(np.r_[True, (codes[1:] != codes[:-1]) | (is_source[1:] != is_source[:-1])])
+        ends = np.r_[starts[1:], len(ids)]
+        ids, amounts = ids.tolist(), amounts.tolist()
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            key = (int(codes[start]), bool(is_source[start]))
+            index.groups[key] = list(zip(amounts[start:end], ids[start:end]))
+        return index
+
+    def add(self, code: int, is_source: bool, value, i: int) -> None:
+        insort(self.groups.setdefault((code, is_source), []), (abs(value), i))
+
+    def remove(self, code: int, is_source: bool, value, i: int) -> None:
+        group = self.groups.get((code, is_source))
+        if not group:
+            return
+        at = bisect_left(group, (abs(value), i))
+        if at < len(group) and group[at][1] == i:
+            del group[at]
+
+    def _end(self, group: List[Tuple], max_value, strict: bool) -> int:
+        if max_value is None:
+            return len(group)
+        if strict:
+            return bisect_left(group, (max_value, -1))
+        return bisect_right(group, (max_value, math.inf))
+
+    def ids(self, code: int, is_source: bool, max_value=None, strict: bool = False) -> List[int]:
+        """Ids with |value| <= max_value (< when strict), by |value| then id."""
+        group = self.groups.get((code, is_source), [])
+        return [i for _, i in group[:self._end(group, max_value, strict)]]
+
+    def smallest(self, code: int, is_source: bool) -> Optional[int]:
+        """Id with the smallest |value|, the lowest id among ties."""
+        group = self.groups.get((code, is_source))
+        return group[0][1] if group else None
+
+    def largest(self, code: int, is_source: bool, max_value=None, strict: bool = False) -> Optional[int]:
+        """Id with the largest |value| within max_value, the lowest id among ties."""
+        group = self.groups.get((code, is_source), [])
+        end = self._end(group, max_value, strict)
+        if end == 0:
+            return None
+        return group[bisect_left(group, (group[end - 1][0], -1))][1]
+
+    def count(self, code: int, is_source: bool) -> int:
+        return len(self.groups.get((code, is_source), ()))
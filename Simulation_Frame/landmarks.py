@@ -0,0 +1,122 @@
+import heapq
+import math
+import random
+from typing import Callable, Optional, Tuple, Union
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from .routinggraph import RoutingGraph
+
+
+class LandmarkIndex:
+    """
+    ALT (A*, landmarks, triangle inequality) lower bounds for one weight.
+    Distances from K landmarks to every node are precomputed; for any nodes
+    u, t and landmark L, |d(L, t) - d(L, u)| <= d(u, t) on an undirected graph.
+
+    The bounds may be computed on a cheaper `bound_weights` array instead of
+    the weight being searched. As long as every edge's search weight stays at
+    or above its bound weight, the heuristic remains admissible and consistent.
+    That lets one index serve the adaptive heuristic weight while it changes.
+    """
+
+    def __init__(self, landmarks: np.ndarray, distances: np.ndarray, weight: str, bounded: bool = False):
+        self.landmarks = landmarks
+        self.distances = distances
+        self.weight = weight
+        # True when built on bound_weights, i.e. it survives changes to the weight itself
+        self.bounded = bounded
+        # unreachable entries become 0 so they never tighten a bound; nodes in
+        # different components have no path for the bound to be wrong about
+        finite = np.where(np.isfinite(distances), distances, 0.0)
+        self.by_node = finite.T.tolist()
+        # nodes popped by the last astar() call; shared by every caller, so
+        # concurrent code should take the count search() returns instead
+        self.last_settled = 0
+
+    @classmethod
+    def build(cls, graph: RoutingGraph, weight: str = "length", k: int = 8, seed: int = 0,
+              bound_weights: Optional[np.ndarray] = None) -> "LandmarkIndex":
+        """Pick k landmarks by farthest-point selection and compute their distance arrays."""
+        n = len(graph)
+        weights = graph.weight_array(weight) if bound_weights is None else bound_weights
+        csr = csr_matrix((weights, graph.indices, graph.indptr), shape=(n, n))
+        k = min(k, n)
+
+        landmarks = [random.Random(seed).randrange(n)]
+        rows = [dijkstra(csr, directed=True, indices=landmarks[0])]
+        # start from the node farthest from the random seed rather than the seed itself
+        landmarks[0] = int(np.argmax(np.where(np.isfinite(rows[0]), rows[0], -1)))
+        rows[0] = dijkstra(csr, directed=True, indices=landmarks[0])
+        nearest = rows[0].copy()
+        while len(landmarks) < k:
+            candidate = int(np.argmax(np.where(np.isfinite(nearest), nearest, -1)))
+            if nearest[candidate] <= 0:
+                break
+            landmarks.append(candidate)
+            rows.append(dijkstra(csr, directed=True, indices=candidate))
+            nearest = np.minimum(nearest, rows[-1])
+        return cls(np.asarray(landmarks, dtype=np.int64), np.vstack(rows), weight, bounded=bound_weights is not None)
+
+    def bound(self, u: int, t: int) -> float:
+        return max(abs(a - b) for a, b in zip(self.by_node[u], self.by_node[t]))
+
+    def heuristic_to(self, target: int,
+                     lower_bound: Union[np.ndarray, Callable[[int], float], None] = None) -> Callable[[int], float]:
+        """
+        h(u) towards a fixed target, for use inside a search loop. lower_bound
+        is another per-node bound to target (e.g. straight line distance),
+        as an array or a function of the node; the max of two consistent
+        bounds is still consistent.
+        """
+        target_row = self.by_node[target]
+        by_node = self.by_node
+        if lower_bound is None:
+            def h(u: int) -> float:
+                return max(abs(a - b) for a, b in zip(by_node[u], target_row))
+            return h
+        other = lower_bound if callable(lower_bound) else lower_bound.tolist().__getitem__
+
+        def h(u: int) -> float:
+            return max(other(u), max(abs(a - b) for a, b in zip(by_node[u], target_row)))
+        return h
+
+    def node_heuristic(self, graph: RoutingGraph) -> Callable:
+        """Heuristic over graph node ids, in the (u, target) form networkx astar_path expects."""
+        index = {node: i for i, node in enumerate(graph.node_ids.tolist())}
+
+        def h(u, target) -> float:
+            return self.bound(index[u], index[target])
+        return h
+
+    def astar(self, graph: RoutingGraph, source: int, target: int, weight: Optional[str] = None,
+              lower_bound: Union[np.ndarray, Callable[[int], float], None] = None) -> float:
+        """Exact shortest distance between two compact node indices using A* guided by the landmarks."""
+        distance, self.last_settled = self.search(graph, source, target, weight, lower_bound)
+        return distance
+
+    def search(self, graph: RoutingGraph, source: int, target: int, weight: Optional[str] = None,
+               lower_bound: Union[np.ndarray, Callable[[int], float], None] = None) -> Tuple[float, int]:
+        """astar() that also returns the number of nodes it settled, as (distance, settled)."""
+        if source == target:
+            return 0.0, 0
+        settled = 0
+        adj = graph.adjacency(weight or self.weight)
+        h = self.heuristic_to(target, lower_bound)
+        dist = {source: 0.0}
+        heap = [(h(source), 0.0, source)]
+        while heap:
+            _, d, u = heapq.heappop(heap)
+            settled += 1
+            if u == target:
+                return d, settled
+            if d > dist[u]:
+                continue
+            for v, w in adj[u]:
+                nd = d + w
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd + h(v), nd, v))
+        return math.inf, settled
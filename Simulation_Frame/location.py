@@ -1,28 +1,57 @@
 import Simulation_Frame.OSMRouter as OSMRouter
+from . import geodesic
 
 class Location:
+    __slots__ = ("x","y","snap","projected")
+
     def __init__(self, x:int,y:int):
         self.x = x
         self.y = y
+        # (graph version, graph node) of the last snap, see get_node
+        self.snap = None
+        # (graph version, (x, y) meters) in the graph's local frame, see get_xy
+        self.projected = None
 
     def get_distance(self,other,euclidean=False,heuristic=None) -> float:
         if euclidean:
-            return ((self.x - other.x)**2 + (self.y - other.y)**2)**0.5
+            # straight line over the earth in meters, a lower bound on the "length" road distance
+            return float(geodesic.haversine(*self.latlon(),*other.latlon()))
         else:
-            return OSMRouter.road_distance(lat1=self.y,
-            lon1=self.x,
-            lat2=other.y,
-            lon2=other.x,
+            return OSMRouter.node_distance(self.get_node(),
+            other.get_node(),
             weight=heuristic if heuristic else "length")
-    
+
+    def latlon(self) -> tuple:
+        # road queries read y as the latitude and x as the longitude
+        return (self.y,self.x)
+
+    def get_node(self):
+        """Nearest road graph node, snapped once per graph and then reused."""
+        if self.snap is None or self.snap[0] != OSMRouter.graph_version():
+            lat,lon = self.latlon()
+            self.set_node(OSMRouter.nearest_node(lat,lon))
+        return self.snap[1]
+
+    def set_node(self,node) -> None:
+        self.snap = (OSMRouter.graph_version(),node)
+
+    def get_xy(self) -> tuple:
+        """Position in meters in the loaded graph's projection, computed once per graph."""
+        if self.projected is None or self.projected[0] != OSMRouter.graph_version():
+            OSMRouter.project_locations([self])
+        return self.projected[1]
+
     def to_tuple(self) -> tuple:
         return (self.x,self.y)
 
     def __repr__(self):
         return f"({self.x},{self.y})"
-    
+
     def copy(self):
-        return Location(self.x,self.y)
+        location = Location(self.x,self.y)
+        location.snap = self.snap
+        location.projected = self.projected
+        return location
 
     def __str__(self):
-        return self.__repr__()
\ No newline at end of file
+        return self.__repr__()
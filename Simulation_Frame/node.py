@@ -2,11 +2,79 @@ from .location import Location
 
 
 class Node:
+    """
+    A source (value > 0) or sink of one item. Nodes added to a Simulation are
+    views of a row of its NodeStore (id is the row): reads come from values
+    cached on the view, writes to item, value, is_source and location go
+    through to the store's columns as well. Unbound nodes just hold their own values.
+    """
+    __slots__ = ("store","id","_item","_value","_is_source","_location")
+
     def __init__(self, item:str,value:int,location:Location):
-        self.item = item
-        self.value = value
-        self.location = location
-        self.is_source = value > 0
+        # NodeStore and row the node is a view of, assigned by Simulation.add_node/load_nodes
+        self.store = None
+        self.id = None
+        self._item = item
+        self._value = value
+        self._is_source = value > 0
+        self._location = location
+
+    @classmethod
+    def view_of(cls,store,i:int):
+        """Node for an existing store row, see NodeStore.view."""
+        node = cls.__new__(cls)
+        node.store = store
+        node.id = i
+        node._item = store.items[store._item[i]]
+        node._value = store._value[i].item()
+        node._is_source = bool(store._is_source[i])
+        # Location reads y as the latitude and x as the longitude
+        node._location = Location(store._lon[i].item(),store._lat[i].item())
+        return node
+
+    def bind(self,store,i:int) -> None:
+        self.store = store
+        self.id = i
+
+    @property
+    def item(self) -> str:
+        return self._item
+
+    @item.setter
+    def item(self,item:str) -> None:
+        self._item = item
+        if self.store is not None:
+            self.store.set_item(self.id,item)
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    @value.setter
+    def value(self,value:int) -> None:
+        self._value = value
+        if self.store is not None:
+            self.store.set_value(self.id,value)
+
+    @property
+    def is_source(self) -> bool:
+        return self._is_source
+
+    @is_source.setter
+    def is_source(self,is_source:bool) -> None:
+        self._is_source = is_source
+        if self.store is not None:
+            self.store.set_is_source(self.id,is_source)
+
+    @property
+    def location(self) -> Location:
+        return self._location
+
+    @location.setter
+    def location(self,location:Location) -> None:
+        self._location = location
+        if self.store is not None:
+            self.store.set_location(self.id,location)
 
     def get_distance(self,other) -> float:
         return self.location.get_distance(other.location)
@@ -0,0 +1,285 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .itemindex import ItemIndex
+
+# cluster label of nodes that were never clustered
+UNCLUSTERED = -1
+
+
+class NodeStore:
+    """
+    Columnar storage behind a Simulation: one NumPy array per field, indexed
+    by node id. Items are stored as codes into `items`. Node objects are thin
+    views created on first access (see view) and cached so every caller sees
+    the same object for a given id. Item, value, is_source and location are
+    written through the Node views so the values they cache stay current;
+    satisfied and cluster are only kept here.
+
+    `index` groups the unsatisfied rows by item and source/sink, ordered by
+    quantity. It is built on first use and from then on kept up to date by
+    the set_* methods, which is why changes should go through them rather
+    than the arrays.
+
+    Arrays keep spare capacity; the public columns (item, value, lat, lon,
+    is_source, satisfied, cluster) are views over the first `size` rows.
+    """
+
+    def __init__(self, capacity: int = 16):
+        capacity = max(capacity, 16)
+        self.items: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._item = np.zeros(capacity, dtype=np.int32)
+        self._value = np.zeros(capacity, dtype=np.int64)
+        self._lat = np.zeros(capacity, dtype=np.float64)
+        self._lon = np.zeros(capacity, dtype=np.float64)
+        self._is_source = np.zeros(capacity, dtype=bool)
+        self._satisfied = np.zeros(capacity, dtype=bool)
+        self._cluster = np.full(capacity, UNCLUSTERED, dtype=np.int32)
+        self._views: list = []
+        # id() of every view handed out -> its row, for nodes since rebound to another store
+        self._rows: Dict[int, int] = {}
+        self._index: Optional[ItemIndex] = None
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    # ---------------- COLUMNS ----------------
+    @property
+    def item(self) -> np.ndarray:
+        return self._item[:self.size]
+
+    @property
+    def value(self) -> np.ndarray:
+        return self._value[:self.size]
+
+    @property
+    def lat(self) -> np.ndarray:
+        return self._lat[:self.size]
+
+    @property
+    def lon(self) -> np.ndarray:
+        return self._lon[:self.size]
+
+    @property
+    def is_source(self) -> np.ndarray:
+        return self._is_source[:self.size]
+
+    @property
+    def satisfied(self) -> np.ndarray:
+        return self._satisfied[:self.size]
+
+    @property
+    def cluster(self) -> np.ndarray:
+        return self._cluster[:self.size]
+
+    def latlon(self, ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """(n, 2) array of (lat, lon), for every node or the given ids."""
+        if ids is None:
+            return np.column_stack((self.lat, self.lon))
+        return np.column_stack((self._lat[ids], self._lon[ids]))
+    # -------------------------------------------
+
+    def item_code(self, item: str) -> int:
+        code = self._codes.get(item)
+        if code is None:
+            code = self._codes[item] = len(self.items)
+            self.items.append(item)
+        return code
+
+    def code_of(self, item: str) -> Optional[int]:
+        """Code of item, None if no row ever had it (unlike item_code, nothing is added)."""
+        return self._codes.get(item)
+
+    def _reserve(self, extra: int) -> None:
+        needed = self.size + extra
+        capacity = len(self._item)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("_item", "_value", "_lat", "_lon", "_is_source", "_satisfied", "_cluster"):
+            old = getattr(self, name)
+            grown = np.full(capacity, UNCLUSTERED, dtype=old.dtype) if name == "_cluster" else np.zeros(capacity, dtype=old.dtype)
+            grown[:self.size] = old[:self.size]
+            setattr(self, name, grown)
+
+    def append(self, item: str, value: int, lat: float, lon: float, is_source: Optional[bool] = None) -> int:
+        """Add one row, returning its id. No Node object is created."""
+        self._reserve(1)
+        i = self.size
+        code = self.item_code(item)
+        is_source = value > 0 if is_source is None else bool(is_source)
+        self._item[i] = code
+        self._value[i] = value
+        self._lat[i] = lat
+        self._lon[i] = lon
+        self._is_source[i] = is_source
+        self._satisfied[i] = False
+        self._cluster[i] = UNCLUSTERED
+        self._views.append(None)
+        self.size += 1
+        if self._index is not None:
+            self._reindex(i)
+        return i
+
+    def extend(self, items: Iterable[str], values, lats, lons) -> np.ndarray:
+        """Add many rows at once from equal length sequences, returning their ids."""
+        codes = np.fromiter((self.item_code(item) for item in items), dtype=np.int32)
+        return self.extend_codes(codes, values, lats, lons)
+
+    def extend_codes(self, codes, values, lats, lons) -> np.ndarray:
+        """extend() with items already given as codes, see item_code."""
+        values = np.asarray(values, dtype=np.int64).reshape(-1)
+        n = len(values)
+        self._reserve(n)
+        ids = np.arange(self.size, self.size + n)
+        self._item[ids] = codes
+        self._value[ids] = values
+        self._lat[ids] = lats
+        self._lon[ids] = lons
+        self._is_source[ids] = values > 0
+        self._satisfied[ids] = False
+        self._cluster[ids] = UNCLUSTERED
+        self._views.extend([None] * n)
+        self.size += n
+        if self._index is not None:
+            for i, code, value in zip(ids.tolist(), self._item[ids].tolist(), values.tolist()):
+                self._index.add(code, value > 0, value, i)
+        return ids
+
+    def bind(self, node) -> int:
+        """Copy an existing Node into a new row and turn it into the view of that row."""
+        lat, lon = node.location.latlon()
+        i = self.append(node.item, node.value, lat, lon, node.is_source)
+        node.bind(self, i)
+        self._views[i] = node
+        self._rows[id(node)] = i
+        return i
+
+    def view(self, i: int):
+        """The Node for row i, created on first access."""
+        node = self._views[i]
+        if node is None:
+            from .node import Node
+            node = self._views[i] = Node.view_of(self, i)
+            self._rows[id(node)] = i
+        return node
+
+    def views(self, ids: Optional[Iterable[int]] = None) -> list:
+        """Nodes for the given ids, or the cached list of every node (do not modify it)."""
+        if ids is None:
+            for i, node in enumerate(self._views):
+                if node is None:
+                    self.view(i)
+            return self._views
+        return [self.view(i) for i in ids]
+
+    # ---------------- UPDATES ----------------
+    @property
+    def index(self) -> ItemIndex:
+        if self._index is None:
+            self._index = ItemIndex.build(self)
+        return self._index
+
+    def _unindex(self, i: int) -> bool:
+        """Take row i out of the index before a change, True if it has to go back in."""
+        if self._index is None or self._satisfied[i]:
+            return False
+        self._index.remove(int(self._item[i]), bool(self._is_source[i]), int(self._value[i]), i)
+        return True
+
+    def _reindex(self, i: int) -> None:
+        self._index.add(int(self._item[i]), bool(self._is_source[i]), int(self._value[i]), i)
+
+    def set_item(self, i: int, item: str) -> None:
+        indexed = self._unindex(i)
+        self._item[i] = self.item_code(item)
+        if indexed:
+            self._reindex(i)
+
+    def set_value(self, i: int, value: int) -> None:
+        indexed = self._unindex(i)
+        self._value[i] = value
+        if indexed:
+            self._reindex(i)
+
+    def set_is_source(self, i: int, is_source: bool) -> None:
+        indexed = self._unindex(i)
+        self._is_source[i] = is_source
+        if indexed:
+            self._reindex(i)
+
+    def set_location(self, i: int, location) -> None:
+        self._lat[i], self._lon[i] = location.latlon()
+
+    def set_satisfied(self, ids, satisfied: bool = True) -> int:
+        """Mark rows (un)satisfied, returning how many actually changed."""
+        ids = np.unique(np.asarray(ids, dtype=np.int64).reshape(-1))
+        changed = ids[self._satisfied[ids] != satisfied]
+        if self._index is not None:
+            update = self._index.remove if satisfied else self._index.add
+            for i, code, is_source, value in zip(changed.tolist(), self._item[changed].tolist(),
+                                                 self._is_source[changed].tolist(), self._value[changed].tolist()):
+                update(code, is_source, value, i)
+        self._satisfied[changed] = satisfied
+        return len(changed)
+    # -------------------------------------------
+
+    def is_satisfied(self, i: int) -> bool:
+        return bool(self._satisfied[i])
+
+    def owns(self, node) -> bool:
+        i = node.id
+        return node.store is self and i is not None and i < self.size and self._views[i] is node
+
+    def index_of(self, node) -> Optional[int]:
+        """Row node is the view of, None if it is not one of this store's views."""
+        if self.owns(node):
+            return node.id
+        # views keep their nodes alive, so an id() found here is still that node
+        i = self._rows.get(id(node))
+        return i if i is not None and self._views[i] is node else None
+
+    def select(self, item: Optional[str] = None, sources: Optional[bool] = None,
+               satisfied: Optional[bool] = None, cluster: Optional[int] = None) -> np.ndarray:
+        """Ids of the rows matching every given filter, in id order."""
+        mask = np.ones(self.size, dtype=bool)
+        if item is not None:
+            code = self._codes.get(item)
+            if code is None:
+                return np.empty(0, dtype=np.int64)
+            mask &= self.item == code
+        if sources is not None:
+            mask &= self.is_source == sources
+        if satisfied is not None:
+            mask &= self.satisfied == satisfied
+        if cluster is not None:
+            mask &= self.cluster == cluster
+        return np.flatnonzero(mask)
+
+    def items_in_order(self, ids: Optional[np.ndarray] = None) -> List[str]:
+        """Items present in the given rows (all rows by default), in order of their first row."""
+        codes = self.item if ids is None else self._item[ids]
+        unique, first = np.unique(codes, return_index=True)
+        return [self.items[code] for code in unique[np.argsort(first, kind="stable")].tolist()]
+
+    def inventory(self, ids: Optional[np.ndarray] = None) -> Dict[str, int]:
+        """
+        Net value per item over the given rows (all rows by default). Items are
+        listed in order of their first row, as summing node by node would.
+        """
+        codes = self.item if ids is None else self._item[ids]
+        values = self.value if ids is None else self._value[ids]
+        inventory = defaultdict(int)
+        if len(codes) == 0:
+            return inventory
+        unique, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+        sums = np.zeros(len(unique), dtype=np.int64)
+        np.add.at(sums, inverse.reshape(-1), values)
+        for k in np.argsort(first, kind="stable").tolist():
+            inventory[self.items[unique[k]]] = int(sums[k])
+        return inventory
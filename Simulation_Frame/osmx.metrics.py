@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-import math
+import os
 import random
+import sys
 from dataclasses import dataclass
 from typing import Dict, List, Tuple
 
@@ -11,6 +12,15 @@ import networkx as nx
 import numpy as np
 import osmnx as ox
 
+# Ensure project root (containing `Simulation_Frame`) is on sys.path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from Simulation_Frame import geodesic
+from Simulation_Frame.landmarks import LandmarkIndex
+from Simulation_Frame.routinggraph import RoutingGraph
+
 
 # ------------------------------
 # Adaptive Damage Model
@@ -73,13 +83,7 @@ class AdaptiveDamageModel:
 
 def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Great-circle distance (meters)."""
-    r = 6371000.0
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
-    return 2 * r * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return float(geodesic.haversine(lat1, lon1, lat2, lon2))
 
 
 @dataclass(frozen=True)
@@ -227,19 +231,55 @@ def run_edge_traversal_simulation(
 # ------------------------------
 
 
-def build_heuristics(G: nx.Graph, speed_mps: float):
+def build_heuristics(G: nx.Graph, speed_mps: float, landmarks: int = 0):
     """
-    Precompute node lat/lon for fast heuristics.
+    Project node lat/lon once to local meters for fast heuristics.
+    With landmarks > 0, also precompute ALT landmark distances and use the larger
+    of the straight line and landmark bounds (both are admissible, so is their max).
     """
-    latlon = {n: get_node_latlon(G, n) for n in G.nodes()}
+    nodes = list(G.nodes())
+    index = {n: i for i, n in enumerate(nodes)}
+    coords = np.array([get_node_latlon(G, n) for n in nodes], dtype=np.float64).reshape(-1, 2)
+    origin = tuple(coords.mean(axis=0)) if len(coords) else (0.0, 0.0)
+    xy = geodesic.project(coords, origin)
+    # shrinks planar distances enough to stay below the great-circle distance
+    safety = geodesic.projection_safety(coords, origin)
+    # A* asks for h(n, target) with one target per search: compute the whole
+    # row to that target in one vectorized call and answer from it.
+    rows = {}
+
+    def straight_line_heuristic(n1, n2):
+        row = rows.get(n2)
+        if row is None:
+            rows.clear()
+            offset = xy - xy[index[n2]]
+            row = rows[n2] = (np.sqrt(np.einsum("ij,ij->i", offset, offset)) * safety).tolist()
+        return row[index[n1]]  # meters (admissible for edge length)
+
+    if landmarks <= 0:
+        def time_heuristic(n1, n2):
+            return straight_line_heuristic(n1, n2) / speed_mps
+
+        return straight_line_heuristic, time_heuristic
+
+    routing_graph = RoutingGraph.from_networkx(G, weights=("length_m", "time_seconds"))
+    dist_index = LandmarkIndex.build(routing_graph, "length_m", k=landmarks)
+    # Bound time on free-flow time, which the adaptive model never predicts below.
+    free_flow = routing_graph.weight_array("length_m") / speed_mps
+    time_index = LandmarkIndex.build(
+        routing_graph,
+        "time_seconds",
+        k=landmarks,
+        bound_weights=np.minimum(free_flow, routing_graph.weight_array("time_seconds")),
+    )
+    dist_alt = dist_index.node_heuristic(routing_graph)
+    time_alt = time_index.node_heuristic(routing_graph)
 
     def dist_heuristic(n1, n2):
-        lat1, lon1 = latlon[n1]
-        lat2, lon2 = latlon[n2]
-        return haversine_m(lat1, lon1, lat2, lon2)  # meters (admissible for edge length)
+        return max(straight_line_heuristic(n1, n2), dist_alt(n1, n2))
 
     def time_heuristic(n1, n2):
-        return dist_heuristic(n1, n2) / speed_mps
+        return max(straight_line_heuristic(n1, n2) / speed_mps, time_alt(n1, n2))
 
     return dist_heuristic, time_heuristic
 
@@ -249,10 +289,11 @@ def run_trips_with_astar(
     num_trips: int,
     seed: int,
     speed_mps: float,
+    landmarks: int = 0,
 ):
     rng = random.Random(seed)
     nodes = list(G.nodes())
-    dist_heuristic, time_heuristic = build_heuristics(G, speed_mps=speed_mps)
+    dist_heuristic, time_heuristic = build_heuristics(G, speed_mps=speed_mps, landmarks=landmarks)
 
     # Baseline route choice: shortest by distance (length_m).
     # IMPORTANT: We evaluate BOTH strategies on the SAME time surface (`time_seconds`)
@@ -396,6 +437,7 @@ def main() -> None:
     speed_mps = (speed_kmh * 1000.0) / 3600.0
     edge_steps = 999
     num_trips = 9999
+    num_landmarks = 8  # ALT landmarks for the A* heuristic, 0 = straight line only
 
     seed = 42
     random.seed(seed)
@@ -420,7 +462,9 @@ def main() -> None:
 
     # ---- run A* trips baseline vs health-aware ----
     print(f"Running {num_trips} A* trips (baseline vs health-aware) ...")
-    results = run_trips_with_astar(G, num_trips=num_trips, seed=seed + 1, speed_mps=speed_mps)
+    results = run_trips_with_astar(
+        G, num_trips=num_trips, seed=seed + 1, speed_mps=speed_mps, landmarks=num_landmarks
+    )
 
     print("\n=== RESULTS ===")
     print(f"Baseline trips successful: {results['baseline_ok']} / {num_trips}")
@@ -1,14 +1,38 @@
 import pprint
 from typing import Optional,List
 import matplotlib.pyplot as plt
+import numpy as np
+import Simulation_Frame.OSMRouter as OSMRouter
 from .node import Node
 
 class Path:
+    __slots__ = ("nodes","legs","changed","distance")
+
     def __init__(self,nodes:Optional[List[Node]]=None):
         self.nodes = nodes if nodes else []
+        # legs[i] is the RouteLeg from nodes[i] to nodes[i+1], kept while those two nodes stay put
+        self.legs = []
         self.changed=True
         self.distance = self.get_length()
 
+    def get_legs(self,geometry:bool=False) -> list:
+        """
+        Route legs between consecutive nodes. Legs whose two nodes are unchanged
+        are reused, so appending a node costs one new leg; the rest come from
+        the route cache shared by all paths.
+        """
+        pairs = list(zip(self.nodes,self.nodes[1:]))
+        legs = self.legs[:len(pairs)]
+        legs += [None]*(len(pairs)-len(legs))
+        stale = [i for i,(a,b) in enumerate(pairs)
+                 if legs[i] is None or legs[i][0] is not a or legs[i][1] is not b or (geometry and legs[i][2].nodes is None)]
+        if stale:
+            found = OSMRouter.route_legs([pairs[i] for i in stale],geometry=geometry)
+            for i,leg in zip(stale,found):
+                legs[i] = (pairs[i][0],pairs[i][1],leg)
+        self.legs = legs
+        return [leg for _,_,leg in legs]
+
     def get_length(self) -> float:
 
         if not self.changed:
@@ -18,13 +42,28 @@ class Path:
             return 0.0
 
         total_length = 0.0
-        for i in range(1,len(self.nodes)):
-            total_length += self.nodes[i-1].location.get_distance(self.nodes[i].location)
+        for leg in self.get_legs():
+            total_length += leg.distance
         
         self.distance = total_length
         self.changed = False
         return total_length
 
+    def get_route(self) -> np.ndarray:
+        """
+        (lat, lon) points along the roads the path drives, from the first node to
+        the last. Without a local graph (road service) the legs are straight lines.
+        """
+        if self.nodes == []:
+            return np.empty((0,2))
+        local = OSMRouter.remote_client() is None
+        points = [self.nodes[0].location.latlon()]
+        for node,leg in zip(self.nodes[1:],self.get_legs(geometry=local)):
+            if local:
+                points.extend(map(tuple,OSMRouter.route_coords(leg)))
+            points.append(node.location.latlon())
+        return np.array(points,dtype=np.float64)
+
     def add_node(self,node:Node):
         self.nodes.append(node)
         self.changed = True
@@ -67,6 +106,24 @@ class Path:
         print(f"Total length of path: {self.get_length()}")
         plt.show()
 
+    def plotroute(self,color:Optional[str]=None):
+        """plotpath along the road geometry instead of straight lines between nodes."""
+        route = self.get_route()
+        start_node = self.nodes[0]
+        end_node = self.nodes[-1]
+        color = color if color else "-"
+        plt.plot(route[:,1], route[:,0], color)
+        plt.plot([node.location.x for node in self.nodes], [node.location.y for node in self.nodes], "ko", markersize=3)
+        plt.plot(start_node.location.x, start_node.location.y, "go", label="Start Node")
+        plt.plot(end_node.location.x, end_node.location.y, "ro", label="End Node")
+        plt.xlabel("X Position")
+        plt.ylabel("Y Position")
+        plt.title("Route")
+        plt.legend()
+        print(f"Number of nodes in path: {len(self.nodes)}")
+        print(f"Total length of path: {self.get_length()}")
+        plt.show()
+
     def __str__(self):
         return self.__repr__()
     
@@ -0,0 +1,122 @@
+import http.client
+import json
+import math
+import threading
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from .constants import Constants
+
+
+class RoadServiceError(RuntimeError):
+    pass
+
+
+class RoadClient:
+    """
+    Client for the routing service in road-microservice/server.py.
+    Connections are HTTP/1.1 keep-alive and pooled, so a solver issuing many
+    small queries pays for the TCP handshake once. Large requests are split
+    into batches of at most `batch` items.
+    """
+
+    def __init__(self, host: str = Constants.ROAD_SERVICE_HOST, port: int = Constants.ROAD_SERVICE_PORT,
+                 timeout: float = 60.0, pool_size: int = 4, batch: int = Constants.ROAD_SERVICE_BATCH):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.batch = batch
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def request(self, method: str, path: str, payload: Optional[dict] = None) -> dict:
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        # a pooled connection may have been closed by the server in the meantime, retry once on a fresh one
+        for attempt in range(2):
+            conn = self._acquire() if attempt == 0 else http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (ConnectionError, http.client.HTTPException, OSError):
+                conn.close()
+                if attempt == 1:
+                    raise
+                continue
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            result = json.loads(data) if data else {}
+            if response.status != 200:
+                raise RoadServiceError(f"{method} {path} failed with {response.status}: {result.get('error', data)}")
+            return result
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def health(self) -> dict:
+        return self.request("GET", "/health")
+
+    def nearest(self, points: Sequence) -> List[int]:
+        """Graph node ids nearest to (lat, lon) points."""
+        points = [[float(lat), float(lon)] for lat, lon in points]
+        nodes = []
+        for start in range(0, len(points), self.batch):
+            nodes.extend(self.request("POST", "/nearest", {"points": points[start:start + self.batch]})["nodes"])
+        return nodes
+
+    def matrix(self, sources: Sequence, targets: Optional[Sequence] = None, weight: str = "length") -> np.ndarray:
+        """Distances between graph node ids, shape (len(sources), len(targets)). Unreachable pairs are inf."""
+        sources = [int(node) for node in sources]
+        targets = sources if targets is None else [int(node) for node in targets]
+        table = np.empty((len(sources), len(targets)), dtype=np.float64)
+        rows = max(1, self.batch // max(1, len(targets)))
+        for start in range(0, len(sources), rows):
+            result = self.request("POST", "/matrix", {"sources": sources[start:start + rows], "targets": targets, "weight": weight})
+            table[start:start + rows] = np.array(result["distances"], dtype=np.float64).reshape(-1, len(targets))
+        # unreachable pairs come back as null, which numpy reads as nan
+        table[np.isnan(table)] = np.inf
+        return table
+
+    def distances(self, pairs: Sequence, weight: str = "length") -> List[float]:
+        """Distances for (orig_node, dest_node) pairs."""
+        pairs = [[int(u), int(v)] for u, v in pairs]
+        distances = []
+        for start in range(0, len(pairs), self.batch):
+            result = self.request("POST", "/route", {"pairs": pairs[start:start + self.batch], "weight": weight})
+            distances.extend(math.inf if d is None else d for d in result["distances"])
+        return distances
+
+    def routes(self, pairs: Sequence, weight: str = "length") -> List[List[int]]:
+        """Node sequences of the shortest routes for (orig_node, dest_node) pairs, empty when unreachable."""
+        return self.legs(pairs, weight)[1]
+
+    def legs(self, pairs: Sequence, weight: str = "length") -> tuple:
+        """(distances, node sequences) of the shortest routes for (orig_node, dest_node) pairs."""
+        pairs = [[int(u), int(v)] for u, v in pairs]
+        distances, paths = [], []
+        for start in range(0, len(pairs), self.batch):
+            result = self.request("POST", "/route", {"pairs": pairs[start:start + self.batch], "weight": weight, "paths": True})
+            distances.extend(math.inf if d is None else d for d in result["distances"])
+            paths.extend(result["paths"])
+        return distances, paths
@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class RouteLeg:
+    """
+    Road route between two snapped graph nodes: its distance and, once someone
+    asked for the geometry, the graph node ids it passes through from
+    orig_node to dest_node.
+    """
+
+    def __init__(self, orig_node, dest_node, distance: float, nodes: Optional[Tuple] = None):
+        self.orig_node = orig_node
+        self.dest_node = dest_node
+        self.distance = distance
+        self.nodes = nodes
+
+    def reversed(self) -> "RouteLeg":
+        nodes = self.nodes[::-1] if self.nodes is not None else None
+        return RouteLeg(self.dest_node, self.orig_node, self.distance, nodes)
+
+    def __repr__(self):
+        hops = len(self.nodes) if self.nodes is not None else "?"
+        return f"RouteLeg({self.orig_node} -> {self.dest_node}, {self.distance:.1f}, {hops} nodes)"
+
+
+class RouteLegCache:
+    """
+    Bounded LRU cache of RouteLegs keyed on (snapped origin, snapped destination, weight).
+    The road graph is undirected, so a leg is stored once in (smaller, larger)
+    node order and handed out reversed when asked for the other way round.
+    """
+
+    def __init__(self, maxsize: int = 50000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, orig_node, dest_node, weight: str) -> Optional[RouteLeg]:
+        forward = orig_node <= dest_node
+        key = (orig_node, dest_node, weight) if forward else (dest_node, orig_node, weight)
+        leg = self.entries.get(key)
+        if leg is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return leg if forward else leg.reversed()
+
+    def put(self, leg: RouteLeg, weight: str) -> None:
+        if self.maxsize <= 0:
+            return
+        if leg.orig_node > leg.dest_node:
+            leg = leg.reversed()
+        key = (leg.orig_node, leg.dest_node, weight)
+        self.entries[key] = leg
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def resize(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self, weight: Optional[str] = None) -> None:
+        """Drop every leg, or only the legs of one weight."""
+        if weight is None:
+            self.entries.clear()
+            return
+        for key in [key for key in self.entries if key[2] == weight]:
+            del self.entries[key]
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        geometry = sum(1 for leg in self.entries.values() if leg.nodes is not None)
+        return {
+            "size": len(self.entries),
+            "with_geometry": geometry,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
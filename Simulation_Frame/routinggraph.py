@@ -0,0 +1,272 @@
+import hashlib
+import math
+from typing import Callable, Dict, Iterable, List
+
+import numpy as np
+import networkx as nx
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+
+from . import geodesic
+
+DEFAULT_WEIGHTS = ("length", "heuristic")
+
+
+def _edge_arrays(G: nx.Graph, node_ids: np.ndarray, weights: Iterable[str]):
+    """
+    Both directions of every edge of G as sorted (row, col) index arrays plus one
+    weight array per attribute. Parallel edges keep the minimum of each weight
+    and missing weights count as 1, matching networkx shortest paths.
+    """
+    weights = list(weights)
+    us, vs = [], []
+    values = {weight: [] for weight in weights}
+    for u, v, data in G.edges(data=True):
+        us.append(u)
+        vs.append(v)
+        for weight in weights:
+            values[weight].append(float(data.get(weight, 1.0)))
+    u_idx = np.searchsorted(node_ids, np.asarray(us, dtype=node_ids.dtype))
+    v_idx = np.searchsorted(node_ids, np.asarray(vs, dtype=node_ids.dtype))
+    rows = np.concatenate((u_idx, v_idx)).astype(np.int32)
+    cols = np.concatenate((v_idx, u_idx)).astype(np.int32)
+    values = {weight: np.tile(np.asarray(arr, dtype=np.float64), 2) for weight, arr in values.items()}
+    return _compact_edges(rows, cols, values)
+
+
+def _compact_edges(rows: np.ndarray, cols: np.ndarray, values: Dict[str, np.ndarray]):
+    """Sort directed edge arrays by (row, col), dropping self loops and keeping the minimum weight of duplicates."""
+    # drop self loops, they never shorten a path
+    keep = rows != cols
+    rows, cols = rows[keep], cols[keep]
+    values = {weight: arr[keep] for weight, arr in values.items()}
+
+    order = np.lexsort((cols, rows))
+    rows, cols = rows[order], cols[order]
+    values = {weight: arr[order] for weight, arr in values.items()}
+    if len(rows) == 0:
+        return rows, cols, values
+    starts = np.flatnonzero(np.r_[True, (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])])
+    values = {weight: np.minimum.reduceat(arr, starts) for weight, arr in values.items()}
+    return rows[starts], cols[starts], values
+
+
+class RoutingGraph:
+    """
+    Compact array-backed copy of an undirected road graph.
+    Nodes are renumbered 0..n-1 in sorted graph node id order; `node_ids` maps
+    back. Adjacency is CSR (`indptr`/`indices`) with one weight array per
+    attribute and `coords` holds (lat, lon) per node. `xy` is the same
+    positions projected once to local meters, used for snapping and A* bounds.
+    """
+
+    def __init__(self, node_ids: np.ndarray, coords: np.ndarray, indptr: np.ndarray,
+                 indices: np.ndarray, weights: Dict[str, np.ndarray]):
+        self.node_ids = node_ids
+        self.coords = coords
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self._csr = {}
+        self._fingerprints = {}
+        self._adjacency = {}
+        self._tree = None
+        self._xy = None
+        self._xy_rows = None
+        self.origin = tuple(coords.mean(axis=0).tolist()) if len(coords) else (0.0, 0.0)
+        # scales projected distances down to lower bounds on great-circle distance
+        self.projection_safety = geodesic.projection_safety(coords, self.origin)
+
+    @classmethod
+    def _from_edges(cls, node_ids: np.ndarray, coords: np.ndarray, rows: np.ndarray,
+                    cols: np.ndarray, values: Dict[str, np.ndarray]) -> "RoutingGraph":
+        n = len(node_ids)
+        indptr = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        return cls(node_ids, coords, indptr, cols, values)
+
+    @classmethod
+    def from_networkx(cls, G: nx.Graph, weights: Iterable[str] = DEFAULT_WEIGHTS) -> "RoutingGraph":
+        node_ids = np.asarray(sorted(G.nodes), dtype=np.int64)
+        coords = np.array([(G.nodes[node]["y"], G.nodes[node]["x"]) for node in node_ids.tolist()],
+                          dtype=np.float64).reshape(-1, 2)
+        rows, cols, values = _edge_arrays(G, node_ids, weights)
+        return cls._from_edges(node_ids, coords, rows, cols, values)
+
+    @classmethod
+    def union(cls, graphs: List["RoutingGraph"]) -> "RoutingGraph":
+        """
+        One graph over several that share node ids, e.g. overlapping tiles.
+        Edges present in more than one keep their minimum weight; only weights
+        every graph has are kept.
+        """
+        graphs = list(graphs)
+        names = [name for name in graphs[0].weights if all(graph.has_weight(name) for graph in graphs)] if graphs else []
+        all_ids = np.concatenate([graph.node_ids for graph in graphs]) if graphs else np.empty(0, dtype=np.int64)
+        node_ids, first = np.unique(all_ids, return_index=True)
+        coords = np.concatenate([graph.coords for graph in graphs])[first] if graphs else np.empty((0, 2))
+        rows, cols = [], []
+        values = {name: [] for name in names}
+        for graph in graphs:
+            degree = np.diff(graph.indptr)
+            rows.append(np.searchsorted(node_ids, np.repeat(graph.node_ids, degree)))
+            cols.append(np.searchsorted(node_ids, graph.node_ids[graph.indices]))
+            for name in names:
+                values[name].append(graph.weights[name])
+        rows = np.concatenate(rows).astype(np.int32) if rows else np.empty(0, dtype=np.int32)
+        cols = np.concatenate(cols).astype(np.int32) if cols else np.empty(0, dtype=np.int32)
+        values = {name: np.concatenate(arrs) for name, arrs in values.items()}
+        rows, cols, values = _compact_edges(rows, cols, values)
+        return cls._from_edges(node_ids, coords.reshape(-1, 2), rows, cols, values)
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self) -> int:
+        """Undirected edge count."""
+        return len(self.indices) // 2
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.node_ids, self.coords, self.indptr, self.indices, *self.weights.values()]
+        return sum(arr.nbytes for arr in arrays)
+
+    def index_of(self, nodes) -> np.ndarray:
+        """Compact indices of graph node ids, vectorized."""
+        nodes = np.asarray(nodes, dtype=self.node_ids.dtype)
+        idx = np.searchsorted(self.node_ids, nodes)
+        idx = np.minimum(idx, len(self.node_ids) - 1)
+        if not np.all(self.node_ids[idx] == nodes):
+            raise KeyError("Node is not in the routing graph")
+        return idx
+
+    @property
+    def xy(self) -> np.ndarray:
+        """Node positions as (x, y) meters around the graph's mean position."""
+        if self._xy is None:
+            self._xy = geodesic.project(self.coords, self.origin)
+        return self._xy
+
+    def project(self, points) -> np.ndarray:
+        """(lat, lon) points in the same local meters as xy."""
+        return geodesic.project(points, self.origin)
+
+    def nearest(self, points) -> np.ndarray:
+        """Compact indices of the nodes nearest to (lat, lon) points."""
+        return self.nearest_xy(self.project(points))
+
+    def nearest_xy(self, xy) -> np.ndarray:
+        """nearest() for points already projected with project()."""
+        if self._tree is None:
+            self._tree = cKDTree(self.xy)
+        _, idx = self._tree.query(np.asarray(xy, dtype=np.float64).reshape(-1, 2))
+        return idx
+
+    def straight_line_bound(self, target: int) -> np.ndarray:
+        """
+        Lower bound in meters on the road distance from every node to target,
+        valid for weights in meters such as length.
+        """
+        offset = self.xy - self.xy[target]
+        return np.sqrt(np.einsum("ij,ij->i", offset, offset)) * self.projection_safety
+
+    def straight_line_to(self, target: int) -> Callable[[int], float]:
+        """
+        straight_line_bound as a function of one node, for searches that only
+        look at a small part of the graph and should not pay for every node.
+        """
+        if self._xy_rows is None:
+            self._xy_rows = self.xy.tolist()
+        rows = self._xy_rows
+        tx, ty = rows[target]
+        safety = self.projection_safety
+
+        def bound(u: int) -> float:
+            x, y = rows[u]
+            return math.hypot(x - tx, y - ty) * safety
+        return bound
+
+    def has_weight(self, weight: str) -> bool:
+        return weight in self.weights
+
+    def weight_array(self, weight: str) -> np.ndarray:
+        if weight not in self.weights:
+            raise KeyError(f"Routing graph has no '{weight}' weight, available: {list(self.weights)}")
+        return self.weights[weight]
+
+    def csr(self, weight: str = "length") -> csr_matrix:
+        """scipy view of the adjacency for one weight, shares the underlying arrays."""
+        if weight not in self._csr:
+            n = len(self.node_ids)
+            self._csr[weight] = csr_matrix((self.weight_array(weight), self.indices, self.indptr), shape=(n, n))
+        return self._csr[weight]
+
+    def adjacency(self, weight: str = "length") -> list:
+        """Per-node lists of (neighbour, weight) for search loops written in python."""
+        if weight not in self._adjacency:
+            indices = self.indices.tolist()
+            weights = self.weight_array(weight).tolist()
+            bounds = self.indptr.tolist()
+            self._adjacency[weight] = [list(zip(indices[bounds[i]:bounds[i + 1]], weights[bounds[i]:bounds[i + 1]]))
+                                       for i in range(len(self.node_ids))]
+        return self._adjacency[weight]
+
+    def fingerprint(self, weight: str = "length") -> str:
+        """Hash of the structure and one weight, changes whenever either does."""
+        if weight not in self._fingerprints:
+            digest = hashlib.sha1()
+            for arr in (self.node_ids, self.indptr, self.indices, self.weight_array(weight)):
+                digest.update(np.ascontiguousarray(arr).tobytes())
+            self._fingerprints[weight] = digest.hexdigest()[:16]
+        return self._fingerprints[weight]
+
+    def set_weight(self, weight: str, G: nx.Graph) -> None:
+        """(Re)load one weight attribute from the networkx graph the routing graph was built from."""
+        rows, cols, values = _edge_arrays(G, self.node_ids, [weight])
+        if not np.array_equal(cols, self.indices):
+            raise ValueError("Graph structure changed, rebuild the RoutingGraph instead")
+        self.weights[weight] = values[weight]
+        self._csr.pop(weight, None)
+        self._fingerprints.pop(weight, None)
+        self._adjacency.pop(weight, None)
+
+    def distances_from(self, sources, weight: str = "length", limit: float = np.inf) -> np.ndarray:
+        """Single-source (or one row per source) shortest distances over the whole graph."""
+        return dijkstra(self.csr(weight), directed=True, indices=sources, limit=limit)
+
+    def distance(self, source: int, target: int, weight: str = "length") -> float:
+        if source == target:
+            return 0.0
+        return float(self.distances_from(source, weight)[target])
+
+    def shortest_paths(self, source: int, targets, weight: str = "length") -> tuple:
+        """
+        One search from source to several targets, returning (distances, paths)
+        where each path is the array of compact indices from source to target,
+        None when the target is unreachable.
+        """
+        targets = np.asarray(targets, dtype=np.int64).reshape(-1)
+        dist, predecessors = dijkstra(self.csr(weight), directed=True, indices=source, return_predecessors=True)
+        paths = []
+        for target in targets.tolist():
+            if not np.isfinite(dist[target]):
+                paths.append(None)
+                continue
+            path = [target]
+            while path[-1] != source:
+                path.append(predecessors[path[-1]])
+            paths.append(np.asarray(path[::-1], dtype=np.int64))
+        return dist[targets], paths
+
+    def save(self, file) -> None:
+        np.savez(file, node_ids=self.node_ids, coords=self.coords, indptr=self.indptr,
+                 indices=self.indices, weight_names=np.array(list(self.weights)),
+                 **{f"weight_{weight}": arr for weight, arr in self.weights.items()})
+
+    @classmethod
+    def load(cls, file) -> "RoutingGraph":
+        with np.load(file, allow_pickle=True) as data:
+            weights = {str(weight): data[f"weight_{weight}"] for weight in data["weight_names"]}
+            return cls(data["node_ids"], data["coords"], data["indptr"], data["indices"], weights)
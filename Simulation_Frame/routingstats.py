@@ -0,0 +1,92 @@
+import bisect
+import json
+import threading
+from collections import Counter
+from typing import Optional
+
+# Upper edges of the latency histogram buckets in milliseconds, the last bucket is open ended
+LATENCY_BUCKETS_MS = (0.01, 0.03, 0.1, 0.3, 1, 3, 10, 30, 100, 300, 1000)
+
+
+class RoutingStats:
+    """
+    Counters for where routing time goes: snapping versus searching, which
+    layer answered each distance query (matrix, cache, hierarchy, landmarks,
+    dijkstra, service), a latency histogram and the nodes each search settled.
+    Recording is a few counter updates under a lock, cheap enough to leave on.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = Counter()
+            self.answered_by = Counter()
+            self.seconds_by = Counter()
+            self.snap_calls = 0
+            self.snap_points = 0
+            self.snap_seconds = 0.0
+            self.search_seconds = 0.0
+            self.searches = 0
+            self.settled_nodes = 0
+            self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def record_snap(self, points: int, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.snap_calls += 1
+            self.snap_points += points
+            self.snap_seconds += seconds
+
+    def record_query(self, weight: str, answered_by: str, seconds: float, settled: Optional[int] = None,
+                     queries: int = 1) -> None:
+        """
+        One distance lookup (or `queries` of them answered together). Lookups
+        that had to search record the nodes settled doing so.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.calls[weight] += queries
+            self.answered_by[answered_by] += queries
+            self.seconds_by[answered_by] += seconds
+            self.histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)] += 1
+            if settled is not None:
+                self.searches += 1
+                self.search_seconds += seconds
+                self.settled_nodes += settled
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            total = sum(self.answered_by.values())
+            labels = [f"<={edge}ms" for edge in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+            return {
+                "calls_by_weight": dict(self.calls),
+                "answered_by": dict(self.answered_by),
+                "seconds_by": {name: round(seconds, 6) for name, seconds in self.seconds_by.items()},
+                "precomputed_hit_rate": (self.answered_by["matrix"] + self.answered_by["cache"]) / total if total else 0.0,
+                "snap": {
+                    "calls": self.snap_calls,
+                    "points": self.snap_points,
+                    "seconds": round(self.snap_seconds, 6),
+                },
+                "search": {
+                    "count": self.searches,
+                    "seconds": round(self.search_seconds, 6),
+                    "settled_nodes": self.settled_nodes,
+                    "avg_settled": self.settled_nodes / self.searches if self.searches else 0.0,
+                },
+                "latency_histogram": dict(zip(labels, self.histogram)),
+            }
+
+    def dump(self, path: str, extra: Optional[dict] = None) -> dict:
+        data = self.to_dict()
+        if extra:
+            data.update(extra)
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+        return data
@@ -0,0 +1,62 @@
+from typing import Iterable, Tuple
+
+import networkx as nx
+
+from .routinggraph import DEFAULT_WEIGHTS
+
+
+def largest_component(G: nx.MultiGraph) -> nx.MultiGraph:
+    """Copy of G restricted to its largest connected component."""
+    if G.number_of_nodes() == 0:
+        return G.copy()
+    nodes = max(nx.connected_components(G), key=len)
+    return G.subgraph(nodes).copy()
+
+
+def contract_chains(G: nx.MultiGraph, weights: Iterable[str] = DEFAULT_WEIGHTS) -> int:
+    """
+    Remove, in place, every node that only links two other nodes, joining its
+    two edges into one. The weights are summed (missing weights count as 1, as
+    in routing) so shortest distances between the remaining nodes do not change.
+    Returns the number of nodes removed.
+    """
+    weights = list(weights)
+    removed = 0
+    for v in list(G.nodes):
+        if G.degree(v) != 2:
+            continue
+        (_, u, first), (_, w, second) = G.edges(v, data=True)
+        # self loops and closed rings have nothing to join
+        if u == v or w == v or u == w:
+            continue
+        merged = {weight: float(first.get(weight, 1.0)) + float(second.get(weight, 1.0)) for weight in weights}
+        osmids = []
+        for data in (first, second):
+            osmid = data.get("osmid")
+            if osmid is not None:
+                osmids.extend(osmid if isinstance(osmid, list) else [osmid])
+        if osmids:
+            merged["osmid"] = osmids
+        G.remove_node(v)
+        G.add_edge(u, w, **merged)
+        removed += 1
+    return removed
+
+
+def simplify_routing_graph(G: nx.MultiGraph, largest: bool = True, contract: bool = True,
+                           weights: Iterable[str] = DEFAULT_WEIGHTS) -> Tuple[nx.MultiGraph, dict]:
+    """
+    Shrink an undirected road graph before routing on it: drop everything
+    outside the largest connected component and contract degree-2 chains.
+    Returns the new graph and a report of how much it shrank.
+    """
+    report = {"nodes_before": G.number_of_nodes(), "edges_before": G.number_of_edges()}
+    if largest:
+        G = largest_component(G)
+    else:
+        G = G.copy()
+    report["fragment_nodes_removed"] = report["nodes_before"] - G.number_of_nodes()
+    report["chain_nodes_removed"] = contract_chains(G, weights) if contract else 0
+    report["nodes_after"] = G.number_of_nodes()
+    report["edges_after"] = G.number_of_edges()
+    return G, report
@@ -1,14 +1,18 @@
 from typing import List,Optional
-import random
 from .node import Node
-from .location import Location
 import matplotlib.pyplot as plt
 import numpy as np
 from .constants import Constants
+from . import OSMRouter
+from .distancematrix import DistanceMatrix
+from .nodestore import NodeStore
+from . import geodesic
 class Simulation:
     def __init__(self,area:int,size:int,range:int,items:List[str]=None,latmin:np.float64=Constants.DEFAULT_LATMIN,latmax:np.float64=Constants.DEFAULT_LATMAX,longmin:np.float64=Constants.DEFAULT_LONGMIN,longmax:np.float64=Constants.DEFAULT_LONGMAX):
-        self.nodes:List[Node] = []
-        self.satisfied_nodes = []
+        # node columns; Node objects are views created when first asked for
+        self.store = NodeStore(size)
+        self.unsatisfied_count = 0
+        self.distance_matrix:Optional[DistanceMatrix] = None
         self.area = area
         self.size = size
         self.latmin = latmin
@@ -25,90 +29,211 @@ class Simulation:
             self.items = items
         self.range = range if range else 10
 
-    def populate_nodes(self):
-        for i in range(self.size):
-            item = random.choice(self.items)
-            value = random.randint(-1*self.range,self.range)
-            while value == 0:
-                value = random.randint(-1*self.range,self.range)
-            x_val = np.random.uniform(self.latmin,self.latmax)
-            y_val = np.random.uniform(self.longmin,self.longmax)
-            location = Location(x_val,y_val)
-            node = Node(item,value,location)
-            self.nodes.append(node)
-            self.satisfied_nodes.append(False)
-            # carriage print as a status check for the loop
-            print(f"Populated {i+1} nodes",end="\r")
-        print(f"Populated {self.size} nodes")
+    def populate_nodes(self,seed=None,hotspots=None,hotspot_share:float=Constants.HOTSPOT_SHARE):
+        """
+        Draw self.size nodes in one vectorized pass and add them to the store:
+        items uniformly from self.items, values uniformly over [-range, range]
+        without 0 and positions uniformly over the bounding box.
+        seed: anything np.random.default_rng accepts, a Generator is used as is
+        hotspots: put hotspot_share of the nodes around demand centres instead,
+            either a number of centres drawn uniformly in the box or a list of
+            (lat, lon, radius_m[, weight]) tuples. Positions around a centre are
+            normal with radius_m as the standard deviation, clipped to the box.
+        """
+        rng = np.random.default_rng(seed)
+        n = self.size
+        codes = np.array([self.store.item_code(item) for item in self.items],dtype=np.int32)
+        codes = codes[rng.integers(len(self.items),size=n)]
+        values = rng.integers(-self.range,self.range,size=n)
+        values[values >= 0] += 1
+        lats = rng.uniform(self.latmin,self.latmax,n)
+        lons = rng.uniform(self.longmin,self.longmax,n)
+        if hotspots:
+            self._place_around_hotspots(rng,lats,lons,hotspots,hotspot_share)
+        self.store.extend_codes(codes,values,lats,lons)
+        self.unsatisfied_count += n
+        print(f"Populated {n} nodes")
+
+    def _place_around_hotspots(self,rng:np.random.Generator,lats:np.ndarray,lons:np.ndarray,hotspots,share:float) -> None:
+        if isinstance(hotspots,int):
+            centres = np.column_stack((rng.uniform(self.latmin,self.latmax,hotspots),rng.uniform(self.longmin,self.longmax,hotspots)))
+            radius = np.full(hotspots,Constants.HOTSPOT_RADIUS_M,dtype=np.float64)
+            weight = np.ones(hotspots)
+        else:
+            hotspots = [tuple(hotspot) for hotspot in hotspots]
+            centres = np.array([hotspot[:2] for hotspot in hotspots],dtype=np.float64)
+            radius = np.array([hotspot[2] if len(hotspot) > 2 else Constants.HOTSPOT_RADIUS_M for hotspot in hotspots],dtype=np.float64)
+            weight = np.array([hotspot[3] if len(hotspot) > 3 else 1.0 for hotspot in hotspots],dtype=np.float64)
+        chosen = np.flatnonzero(rng.random(len(lats)) < share)
+        which = rng.choice(len(centres),size=len(chosen),p=weight/weight.sum())
+        # (east, north) offsets in meters, turned into degrees around each centre
+        offset = rng.normal(size=(len(chosen),2))*radius[which,None]
+        centre_lat = centres[which,0]
+        lats[chosen] = np.clip(centre_lat+np.degrees(offset[:,1]/geodesic.EARTH_RADIUS_M),self.latmin,self.latmax)
+        lons[chosen] = np.clip(centres[which,1]+np.degrees(offset[:,0]/(geodesic.EARTH_RADIUS_M*np.cos(np.radians(centre_lat)))),
+                               self.longmin,self.longmax)
+
+    @property
+    def nodes(self) -> List[Node]:
+        """A new list of the node views; add_node is the only way to add nodes."""
+        return list(self.store.views())
 
     def add_node(self,node:Node):
-        self.nodes.append(node)
-        self.satisfied_nodes.append(False)
+        self.store.bind(node)
+        self.unsatisfied_count += 1
         self.size += 1
 
     def load_nodes(self,nodes:Node):
-        self.nodes = nodes
-        self.satisfied_nodes = [False for _ in nodes]
+        """Replace the nodes, they are rebound to this simulation's store."""
+        nodes = list(nodes)
+        self.store = NodeStore(len(nodes))
+        for node in nodes:
+            self.store.bind(node)
+        self.unsatisfied_count = len(nodes)
         self.size = len(nodes)
 
+    @property
+    def satisfied_nodes(self) -> np.ndarray:
+        """Satisfied flag per node, indexed like self.nodes."""
+        return self.store.satisfied
+
+    def index_of(self,node:Node) -> Optional[int]:
+        """Position of node in self.nodes, None if it is not part of this simulation."""
+        return self.store.index_of(node)
+
     def satisfy_node(self,node:Node) -> None:
-        i = self.nodes.index(node)
-        self.satisfied_nodes[i] = True
+        i = self.index_of(node)
+        if i is None:
+            raise ValueError(f"{node!r} is not in the simulation")
+        self.satisfy_node_index(i)
 
     def satisfy_node_index(self,index:int) -> None:
-        self.satisfied_nodes[index] = True
+        if not self.store.is_satisfied(index):
+            self.store.set_satisfied(index,True)
+            self.unsatisfied_count -= 1
+
+    def satisfy_node_indices(self,indices) -> None:
+        self.unsatisfied_count -= self.store.set_satisfied(indices,True)
 
     def unsatisfy_node(self,node:Node) -> None:
-        i = self.nodes.index(node)
-        self.satisfied_nodes[i] = False
+        i = self.index_of(node)
+        if i is None:
+            raise ValueError(f"{node!r} is not in the simulation")
+        self.unsatisfy_node_index(i)
     
     def unsatisfy_node_index(self,index:int) -> None:
-        self.satisfied_nodes[index] = False
+        if self.store.is_satisfied(index):
+            self.store.set_satisfied(index,False)
+            self.unsatisfied_count += 1
 
     def get_unsatisfied_nodes(self) -> List[Node]:
-        unsat_nodes = []
-        for i in range(len(self.nodes)):
-            if self.satisfied_nodes[i] == False:
-                unsat_nodes.append(self.nodes[i])
-        
-        return unsat_nodes
-                
+        return self.store.views(self.store.select(satisfied=False).tolist())
+
+    def get_satisfied_nodes(self) -> List[Node]:
+        return self.store.views(self.store.select(satisfied=True).tolist())
+
+    def filter_nodes(self,item:Optional[str]=None,sources:Optional[bool]=None,satisfied:Optional[bool]=None) -> List[Node]:
+        """Nodes matching every given filter, selected on the columns and in node order."""
+        return self.store.views(self.store.select(item=item,sources=sources,satisfied=satisfied).tolist())
+
+    def items_in_order(self,sources:Optional[bool]=None) -> List[str]:
+        """Items of the nodes (or only the sources/sinks) in order of their first node."""
+        return self.store.items_in_order(self.store.select(sources=sources))
+
+    def unsatisfied_sources(self,item:str,max_value=None,strict:bool=False) -> List[Node]:
+        """
+        Unsatisfied sources of item with value <= max_value (< when strict),
+        smallest first and in node order among equal values. Read from the
+        store's item index, so it costs a bisect plus the nodes returned.
+        """
+        return self._indexed(item,True,max_value,strict)
+
+    def unsatisfied_sinks(self,item:str,max_value=None,strict:bool=False) -> List[Node]:
+        """Unsatisfied sinks of item with |value| <= max_value, ordered like unsatisfied_sources."""
+        return self._indexed(item,False,max_value,strict)
+
+    def _indexed(self,item:str,is_source:bool,max_value,strict:bool) -> List[Node]:
+        code = self.store.code_of(item)
+        if code is None:
+            return []
+        return self.store.views(self.store.index.ids(code,is_source,max_value,strict))
+
+    def smallest_unsatisfied_sink(self,item:str) -> Optional[Node]:
+        code = self.store.code_of(item)
+        i = None if code is None else self.store.index.smallest(code,False)
+        return None if i is None else self.store.view(i)
+
+    def largest_unsatisfied_sink(self,item:str,max_value=None,strict:bool=False) -> Optional[Node]:
+        """Unsatisfied sink of item with the largest |value| within max_value, the first node among ties."""
+        code = self.store.code_of(item)
+        i = None if code is None else self.store.index.largest(code,False,max_value,strict)
+        return None if i is None else self.store.view(i)
+
+    def inventory(self,satisfied:Optional[bool]=None) -> dict:
+        """Net value per item over all nodes, or only the (un)satisfied ones."""
+        if satisfied is None:
+            return self.store.inventory()
+        return self.store.inventory(self.store.select(satisfied=satisfied))
+
+    def latlon(self) -> np.ndarray:
+        """(lat, lon) of every node as an (n, 2) array, read from the columns."""
+        return self.store.latlon()
+
+    def set_cluster_labels(self,labels) -> None:
+        self.store.cluster[:] = labels
+
     def is_node_satisfied(self,node):
-        return node not in self.get_unsatisfied_nodes()
+        i = self.index_of(node)
+        # nodes outside the simulation were never unsatisfied in it
+        return True if i is None else self.store.is_satisfied(i)
 
     def get_nodes(self) -> List[Node]:
         return self.nodes
+
+    def snap_nodes(self) -> None:
+        """Snap every node location to the road graph in one batch."""
+        OSMRouter.snap_locations(node.location for node in self.store.views())
+
+    def compute_distance_matrix(self,weight:str="length",workers:int=1) -> DistanceMatrix:
+        """
+        Precompute road distances between all nodes. Once registered with the
+        router every Location.get_distance between covered nodes is a table read.
+        workers > 1 computes the matrix on a process pool.
+        """
+        if self.distance_matrix:
+            OSMRouter.drop_distance_matrix(self.distance_matrix)
+        self.distance_matrix = DistanceMatrix(self.store.views(),weight=weight).compute(workers=workers)
+        OSMRouter.use_distance_matrix(self.distance_matrix)
+        return self.distance_matrix
+
+    def get_distance(self,a:Node,b:Node) -> float:
+        if self.distance_matrix:
+            return self.distance_matrix.get(a,b)
+        return a.get_distance(b)
     
     def plotnodes(self):
-        x = [node.location.x for node in self.nodes]
-        y = [node.location.y for node in self.nodes]
-        plt.scatter(x, y)
+        plt.scatter(self.store.lon, self.store.lat)
         plt.xlabel("X Position")
         plt.ylabel("Y Position")
         plt.title("Nodes in Simulation")
         plt.show()
 
     def all_nodes_satisfied(self,sources=False,sinks=False):
-        if sources:
-            sources = list(filter(lambda x: x.is_source,self.nodes))
-            for source in sources:
-                if not self.is_node_satisfied(source):
-                    return False
-        if sinks:
-            sinks = list(filter(lambda x: not x.is_source,self.nodes))
-            for sink in sinks:
-                if not self.is_node_satisfied(sink):
-                    return False
-        return True
+        if self.unsatisfied_count == 0 or not (sources or sinks):
+            return True
+        unsatisfied = ~self.store.satisfied
+        if not (sources and sinks):
+            unsatisfied &= self.store.is_source == bool(sources)
+        return not unsatisfied.any()
 
 
 
     def __repr__(self):
-        size = len(self.nodes)
+        size = len(self.store)
         ret = ""
         ret += f"Number of nodes: {size}\n"
         for i in range(10 if size > 10 else size):
-            ret += f"{i+1}:{self.nodes[i]}"
+            ret += f"{i+1}:{self.store.view(i)}"
         
         return ret
 
@@ -0,0 +1,184 @@
+import hashlib
+import math
+import os
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+import osmnx as ox
+
+from .constants import Constants
+from .geodesic import EARTH_RADIUS_M
+from .routinggraph import RoutingGraph
+from .simplify import contract_chains as contract_graph_chains
+
+Tile = Tuple[int, int]
+
+# ValueError subclasses osmnx raises when an area has no roads (osmnx 2.x and older releases)
+_NO_ROADS_ERRORS = ("InsufficientResponseError", "EmptyOverpassResponse")
+
+
+class TileStore:
+    """
+    Road graph split into a grid of square tiles, each stored on disk as a
+    RoutingGraph. Every tile is downloaded with an overlap margin around its
+    square, so routes between neighbouring tiles can cross the seam. Tiles are
+    loaded when a query needs them and the least recently used ones are
+    dropped once more than max_tiles are in memory.
+
+    Tile (row, col) covers [row, row + 1) x [col, col + 1) tile_m squares
+    north and east of origin, on an equirectangular grid.
+    """
+
+    def __init__(self, origin: Tuple[float, float], tile_m: float = Constants.TILE_SIZE_M,
+                 overlap_m: float = Constants.TILE_OVERLAP_M, max_tiles: int = Constants.MAX_LOADED_TILES,
+                 network_type: str = "drive", contract_chains: bool = True,
+                 directory: Optional[str] = None, download: bool = True):
+        self.origin = (float(origin[0]), float(origin[1]))
+        self.tile_m = float(tile_m)
+        self.overlap_m = float(overlap_m)
+        self.max_tiles = max_tiles
+        self.network_type = network_type
+        self.contract_chains = contract_chains
+        self.download = download
+        if directory is None:
+            directory = os.path.join(Constants.GRAPH_CACHE_DIR, f"tiles-{self.key()}")
+        self.directory = directory
+        self._lon_scale = math.cos(math.radians(self.origin[0]))
+        self._tiles: "OrderedDict[Tile, RoutingGraph]" = OrderedDict()
+        # unions of tiles answered recently, keyed by the set of tiles
+        self._regions: "OrderedDict[frozenset, RoutingGraph]" = OrderedDict()
+        self.max_regions = 4
+        self.loads = 0
+        self.builds = 0
+        self.evictions = 0
+
+    def key(self) -> str:
+        parts = [
+            f"{round(self.origin[0], 7)}", f"{round(self.origin[1], 7)}",
+            f"{self.tile_m}", f"{self.overlap_m}", self.network_type, f"contract_chains={self.contract_chains}",
+        ]
+        return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+    def tile_of(self, lat: float, lon: float) -> Tile:
+        y = math.radians(lat - self.origin[0]) * EARTH_RADIUS_M
+        x = math.radians(lon - self.origin[1]) * EARTH_RADIUS_M * self._lon_scale
+        return (math.floor(y / self.tile_m), math.floor(x / self.tile_m))
+
+    def tile_bounds(self, tile: Tile, overlap: bool = True) -> Tuple[float, float, float, float]:
+        """(south, west, north, east) of a tile in degrees, including the overlap margin by default."""
+        margin = self.overlap_m if overlap else 0.0
+        row, col = tile
+        to_lat = math.degrees(1 / EARTH_RADIUS_M)
+        to_lon = to_lat / self._lon_scale
+        south = self.origin[0] + (row * self.tile_m - margin) * to_lat
+        north = self.origin[0] + ((row + 1) * self.tile_m + margin) * to_lat
+        west = self.origin[1] + (col * self.tile_m - margin) * to_lon
+        east = self.origin[1] + ((col + 1) * self.tile_m + margin) * to_lon
+        return south, west, north, east
+
+    def tile_path(self, tile: Tile) -> str:
+        return os.path.join(self.directory, f"tile-{tile[0]}_{tile[1]}.npz")
+
+    def tiles_around(self, points: Iterable[Tuple[float, float]], pad: int = 0) -> List[Tile]:
+        """Tiles of the rectangle spanned by the points' tiles, grown by pad tiles on every side."""
+        tiles = [self.tile_of(lat, lon) for lat, lon in points]
+        rows = [row for row, _ in tiles]
+        cols = [col for _, col in tiles]
+        return [(row, col)
+                for row in range(min(rows) - pad, max(rows) + pad + 1)
+                for col in range(min(cols) - pad, max(cols) + pad + 1)]
+
+    def build_tile(self, tile: Tile) -> RoutingGraph:
+        """Download one tile and store it, an area without roads gives an empty graph."""
+        south, west, north, east = self.tile_bounds(tile)
+        try:
+            G = ox.graph_from_bbox((west, south, east, north), network_type=self.network_type,
+                                   retain_all=True, truncate_by_edge=True)
+        except ValueError as error:
+            # osmnx has no public errors module, so match the empty-area error by name. Anything
+            # else, such as a bad HTTP status, propagates instead of leaving an empty tile on disk.
+            if type(error).__name__ not in _NO_ROADS_ERRORS:
+                raise
+            graph = RoutingGraph(np.empty(0, dtype=np.int64), np.empty((0, 2)), np.zeros(1, dtype=np.int32),
+                                 np.empty(0, dtype=np.int32), {"length": np.empty(0), "heuristic": np.empty(0)})
+        else:
+            G = ox.convert.to_undirected(G)
+            if self.contract_chains:
+                contract_graph_chains(G)
+            graph = RoutingGraph.from_networkx(G)
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.tile_path(tile)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            graph.save(f)
+        os.replace(tmp_path, path)
+        self.builds += 1
+        return graph
+
+    def prebuild(self, south: float, west: float, north: float, east: float) -> List[Tile]:
+        """Download and store every tile covering a bounding box that is not on disk yet."""
+        tiles = self.tiles_around([(south, west), (north, east)])
+        for tile in tiles:
+            if not os.path.exists(self.tile_path(tile)):
+                self.build_tile(tile)
+        return tiles
+
+    def get_tile(self, tile: Tile) -> Optional[RoutingGraph]:
+        """The tile's graph, loaded (or built when download is on) on first use. None if unavailable."""
+        if tile in self._tiles:
+            self._tiles.move_to_end(tile)
+            return self._tiles[tile]
+        path = self.tile_path(tile)
+        graph = None
+        if os.path.exists(path):
+            try:
+                graph = RoutingGraph.load(path)
+                self.loads += 1
+            except (OSError, ValueError, KeyError):
+                graph = None
+        if graph is None:
+            if not self.download:
+                return None
+            graph = self.build_tile(tile)
+        self._tiles[tile] = graph
+        while len(self._tiles) > self.max_tiles:
+            evicted, _ = self._tiles.popitem(last=False)
+            self.evictions += 1
+            for region in [region for region in self._regions if evicted in region]:
+                del self._regions[region]
+        return graph
+
+    def region(self, tiles: Iterable[Tile]) -> RoutingGraph:
+        """One routing graph over the union of the given tiles."""
+        tiles = frozenset(tiles)
+        if tiles in self._regions:
+            self._regions.move_to_end(tiles)
+            return self._regions[tiles]
+        graphs = [graph for graph in (self.get_tile(tile) for tile in sorted(tiles)) if graph is not None]
+        graph = RoutingGraph.union(graphs)
+        # a region is dropped with any of its tiles, so one larger than the tile budget is not kept
+        if len(tiles) <= self.max_tiles:
+            self._regions[tiles] = graph
+        while len(self._regions) > self.max_regions:
+            self._regions.popitem(last=False)
+        return graph
+
+    def region_around(self, points: List[Tuple[float, float]], pad: int = 0) -> RoutingGraph:
+        return self.region(self.tiles_around(points, pad=pad))
+
+    def loaded_tiles(self) -> List[Tile]:
+        return list(self._tiles)
+
+    def clear(self) -> None:
+        self._tiles.clear()
+        self._regions.clear()
+
+    def stats(self) -> dict:
+        return {
+            "loaded": len(self._tiles),
+            "max_tiles": self.max_tiles,
+            "loads": self.loads,
+            "builds": self.builds,
+            "evictions": self.evictions,
+        }
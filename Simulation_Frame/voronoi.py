@@ -0,0 +1,70 @@
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+from . import OSMRouter
+
+
+class WarehouseVoronoi:
+    """
+    Road network Voronoi partition around a set of warehouses.
+    One multi-source Dijkstra labels every graph node with its nearest
+    warehouse and the road distance to it, so finding the closest warehouse
+    to any snapped location is an array read instead of one query per warehouse.
+    """
+
+    def __init__(self, warehouses: list, weight: str = "length"):
+        self.warehouses = list(warehouses)
+        self.weight = weight
+        self.graph_version = None
+        # per compact graph node: index into warehouses (-1 if unreachable) and distance to it
+        self.owner: Optional[np.ndarray] = None
+        self.distance: Optional[np.ndarray] = None
+
+    def compute(self) -> "WarehouseVoronoi":
+        self.graph_version = OSMRouter.graph_version()
+        self.owner = None
+        self.distance = None
+        if not self.warehouses or OSMRouter.remote_client() is not None:
+            return self
+        OSMRouter.snap_locations(w.location for w in self.warehouses if w.location.snap is None)
+        graph = OSMRouter.get_routing_graph()
+        indices = graph.index_of([w.location.get_node() for w in self.warehouses])
+        # warehouses sharing a node: the first one listed owns it, as min() over the list would pick
+        sites, first = np.unique(indices, return_index=True)
+        self.distance, _, nearest_site = dijkstra(graph.csr(self.weight), directed=True, indices=sites,
+                                                  min_only=True, return_predecessors=True)
+        warehouse_of_site = np.full(len(graph), -1, dtype=np.int64)
+        warehouse_of_site[sites] = first
+        self.owner = np.where(nearest_site >= 0, warehouse_of_site[np.maximum(nearest_site, 0)], -1)
+        return self
+
+    def _current(self) -> bool:
+        if self.graph_version != OSMRouter.graph_version():
+            self.compute()
+        return self.owner is not None
+
+    def nearest(self, location) -> Tuple[object, float]:
+        """(warehouse, road distance) closest to a Location."""
+        if not self._current():
+            # no local graph to label, fall back to one query per warehouse
+            distances = [location.get_distance(w.location, heuristic=self.weight) for w in self.warehouses]
+            i = int(np.argmin(distances))
+            return self.warehouses[i], distances[i]
+        index = OSMRouter.get_routing_graph().index_of([location.get_node()]).item()
+        owner = self.owner[index]
+        if owner < 0:
+            return self.warehouses[0], math.inf
+        return self.warehouses[owner], float(self.distance[index])
+
+    def nearest_many(self, locations: list) -> List[Tuple[object, float]]:
+        """nearest() for several locations with a single snap and lookup."""
+        locations = list(locations)
+        if not self._current():
+            return [self.nearest(location) for location in locations]
+        OSMRouter.snap_locations(location for location in locations if location.snap is None)
+        indices = OSMRouter.get_routing_graph().index_of([location.get_node() for location in locations])
+        return [(self.warehouses[owner], float(distance)) if owner >= 0 else (self.warehouses[0], math.inf)
+                for owner, distance in zip(self.owner[indices].tolist(), self.distance[indices].tolist())]
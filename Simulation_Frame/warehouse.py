@@ -6,6 +6,9 @@ from collections import defaultdict
 
 class Warehouse(Node):
     def __init__(self,nodes:List[Node],location:Location):
+        # never part of a Simulation's node store
+        self.store = None
+        self.id = None
         self.nodes:List[Node] = []
         self.inventory = Inventory()
         self.location = location
@@ -19,58 +19,24 @@ class DirectMatching(Solution):
     def solve(self) -> List[Path]:
 
         
-        if self.simulation:
-            nodes = self.simulation.get_nodes()
-        else:
+        if not self.simulation:
             print("No simulation present")
             return -1
 
-        source_nodes = []
-        source_items = set()
-
-        sink_nodes = []
-        sink_items = set()
-
-        items_dict = {}
         paths = []
 
-        for node in nodes:
-            if node.is_source:
-                source_nodes.append(node)
-                source_items.add(node.item)
-            else:
-                sink_nodes.append(node)
-                sink_items.add(node.item)
-
-            if node.item in items_dict.keys():
-                items_dict[node.item].append(node)
-            else:
-                items_dict[node.item] = [node]
-
-        for item in items_dict.keys():
-            available = items_dict[item]
-            for source_node in available:
-                if source_node.is_source:
-                    size = abs(source_node.value)
-                    fill_size = 0
-                    sink_node = None
-
-                    #select suitable sink node
-                    for sink_node_cand in available:
-                        if sink_node_cand.is_source:
-                            continue
-                        if self.simulation.is_node_satisfied(sink_node_cand):
-                            continue
-                        if abs(sink_node_cand.value) < size and abs(sink_node_cand.value) > fill_size:
-                            fill_size = abs(sink_node_cand.value) 
-                            sink_node = sink_node_cand
-
-                    if not sink_node:
-                        continue
-                    self.simulation.satisfy_node(source_node)
-                    self.simulation.satisfy_node(sink_node)
-                    path = Path(nodes=[source_node,sink_node])
-                    paths.append(path)
+        for item in self.simulation.items_in_order():
+            for source_node in self.simulation.filter_nodes(item=item,sources=True):
+                size = abs(source_node.value)
+
+                #select suitable sink node: the largest unsatisfied one still below the source
+                sink_node = self.simulation.largest_unsatisfied_sink(item,size,strict=True)
+                if not sink_node or sink_node.value == 0:
+                    continue
+                self.simulation.satisfy_node(source_node)
+                self.simulation.satisfy_node(sink_node)
+                path = Path(nodes=[source_node,sink_node])
+                paths.append(path)
         self.paths = paths
         return paths
     
@@ -4,6 +4,7 @@ from typing import List, Optional
 from collections import defaultdict
 from sklearn.cluster import KMeans, SpectralClustering
 from Simulation_Frame import Solution, Simulation, Node, Path, Cluster
+from Simulation_Frame import OSMRouter
 from Solutions.yousupplyalgo import YouSupplyAlgo
 from random import choice,sample
 from Solutions.yousupplyalgo import YouSupplyAlgo
@@ -165,7 +166,7 @@ def crossover_paths(parent1: Path, parent2: Path, cluster: Cluster) -> Path:
                     feasible.append(cand)
             
             if feasible:
-                next_node = min(feasible, key=lambda n: current.get_distance(n))
+                next_node = OSMRouter.refine_top_k(current, feasible, 1)[0][1]
             else:
                 # No feasible from this parent, try other parent
                 parent_idx = 1 - parent_idx
@@ -200,10 +201,11 @@ def crossover_paths(parent1: Path, parent2: Path, cluster: Cluster) -> Path:
             inventory[n.item] >= abs(n.value)
         ]
         
+        # the oracle prunes candidates that cannot be nearest before exact distances are fetched
         if feasible_sinks:
-            next_node = min(feasible_sinks, key=lambda n: current.get_distance(n))
+            next_node = OSMRouter.refine_top_k(current, feasible_sinks, 1)[0][1]
         else:
-            next_node = min(unvisited, key=lambda n: current.get_distance(n))
+            next_node = OSMRouter.refine_top_k(current, unvisited, 1)[0][1]
         
         offspring.add_node(next_node)
         visited.add(next_node)
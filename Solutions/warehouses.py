@@ -1,5 +1,6 @@
 from typing import Optional,List
 from Simulation_Frame import Warehouse,Location,Node,Solution,Simulation,Path,Driver
+from Simulation_Frame.voronoi import WarehouseVoronoi
 import matplotlib.pyplot as plt
 
 
@@ -37,12 +38,14 @@ class Warehouses(Solution):
             x += 2*self.range
             y = 0
         self.warehouses = warehouses
+        # nearest warehouse for every road node, computed once for this layout
+        voronoi = WarehouseVoronoi(warehouses).compute()
 
 
         #fill warehouse with all the sources
         source_drivers:List[Driver] = []
 
-        sources = list(filter(lambda x: x.is_source,nodes))
+        sources = self.simulation.filter_nodes(sources=True)
         while not self.simulation.all_nodes_satisfied(sources=True):
             for start in sources:
                 if self.simulation.is_node_satisfied(start):
@@ -54,7 +57,7 @@ class Warehouses(Solution):
                     continue
                 self.simulation.satisfy_node(start)
                 driver.add_node(start)
-                available_sources = list(filter(lambda x: not self.simulation.is_node_satisfied(x),sources))
+                available_sources = self.simulation.filter_nodes(sources=True,satisfied=False)
                 closest_sources = sorted(available_sources,key=lambda x:driver.location.get_distance(x.location))
                 for source in closest_sources:
                     if self.simulation.is_node_satisfied(source):
@@ -70,7 +73,7 @@ class Warehouses(Solution):
                         self.simulation.satisfy_node(source)
                         path.add_node(source)
                         
-                closest_warehouse = min(warehouses,key=lambda x:driver.location.get_distance(x.location))
+                closest_warehouse,_ = voronoi.nearest(driver.location)
                 path.add_node(closest_warehouse)
                 closest_warehouse.add_inventory(driver.inventory)
                 paths.append(path)
@@ -105,29 +108,26 @@ class Warehouses(Solution):
         #         print(driver)
 
         #generate the path for each driver from the warehouse
-        sinks = list(filter(lambda x: not x.is_source,nodes))
         for driver in sink_drivers:
             path = Path()
-            closest_warehouse = min(warehouses,key=lambda x:driver.location.get_distance(x.location))
+            closest_warehouse,_ = voronoi.nearest(driver.location)
             path.add_node(closest_warehouse)
             driver.set_location(closest_warehouse.location)
             items = driver.get_items()
             for item in items:
                 amount_left = driver.get_amount(item)
-                available_sinks = list(filter(driver.inventory.is_feasible_sink,sinks))
-                min_sink = min(available_sinks,key= lambda x: abs(x.value)).value
-                closest_sinks = sorted(available_sinks,key=lambda x:driver.location.get_distance(x.location))
+                # only sinks of this item that the amount left can fill, nearest first and in node order on ties
+                available_sinks = self.simulation.unsatisfied_sinks(item,amount_left)
+                closest_sinks = sorted(available_sinks,key=lambda x:(driver.location.get_distance(x.location),x.id))
                 for sink in closest_sinks:
-                    if self.simulation.is_node_satisfied(sink):
-                        continue
-
                     val = abs(sink.value)
                     if val <= amount_left:
                         path.add_node(sink)
                         self.simulation.satisfy_node(sink)
                         amount_left -= val
 
-                    if amount_left < min_sink:
+                    min_sink = self.simulation.smallest_unsatisfied_sink(item)
+                    if min_sink is None or amount_left < abs(min_sink.value):
                         break
 
             if len(path.nodes) == 1: #No sinks
@@ -3,6 +3,8 @@ from typing import Optional,List
 
 from matplotlib import pyplot as plt
 from Simulation_Frame import Solution,Simulation,Node,Path,Cluster
+from Simulation_Frame import geodesic
+from Simulation_Frame import OSMRouter
 from sklearn.cluster import SpectralClustering
 
 
@@ -31,17 +33,24 @@ class YouSupplyAlgo(Solution):
             affinity="nearest_neighbors",
         )
 
-        positions = []
-        for node in nodes:
-            positions.append(node.location.to_tuple())
+        # cluster on local meters, a degree of longitude is shorter than a degree of latitude
+        store = self.simulation.store
+        whole_simulation = len(nodes) == len(store) and all(store.owns(node) and node.id == i for i, node in enumerate(nodes))
+        if whole_simulation:
+            positions = geodesic.project(self.simulation.latlon())
+        else:
+            positions = geodesic.project(geodesic.latlon_array(node.location for node in nodes))
 
         spc.fit(positions)
         cluster_labels = spc.labels_
         clusters = defaultdict(list)
 
+        self.simulation.satisfy_node_indices(range(len(cluster_labels)))
+        if whole_simulation:
+            self.simulation.set_cluster_labels(cluster_labels)
+        simulation_nodes = self.simulation.get_nodes()
         for i, label in enumerate(cluster_labels):
-            self.simulation.satisfy_node_index(i)
-            clusters[label].append(self.simulation.get_nodes()[i])
+            clusters[label].append(simulation_nodes[i])
 
         print()
         for cluster_nodes in clusters.values():
@@ -127,11 +136,11 @@ class YouSupplyAlgo(Solution):
         # if cluster.sinks == [] or cluster.sources == []:
         #     return path
 
-        # function to get the closest node
-        closest = lambda node, possibilities: min(
-            [(node.get_distance(_), _) for _ in possibilities if _ not in visited],
-            key=lambda x: x[0],
-        )
+        # function to get the closest node, all candidate distances are fetched as one batch
+        def closest(node, possibilities):
+            candidates = [_ for _ in possibilities if _ not in visited]
+            distances = OSMRouter.road_distances([(node, _) for _ in candidates])
+            return min(zip(distances, candidates), key=lambda x: x[0])
 
         # TODO: make the first node the closest source node to the curpos
         current = cluster.sources[0]
@@ -0,0 +1,202 @@
+# server.py
+"""
+Local routing service. Holds one road graph in memory and answers batched
+distance queries over HTTP/1.1 keep-alive, so several solver processes can
+share a warm graph instead of each loading their own copy.
+
+    python road-microservice/server.py --lat 11.0 --lon 77.0 --dist 5000
+
+Endpoints (JSON bodies, unreachable distances are null):
+    GET  /health                                   graph size
+    POST /nearest {"points": [[lat, lon], ...]}    -> {"nodes": [...]}
+    POST /matrix  {"sources": [node, ...], "targets": [node, ...], "weight": "length"}
+                                                   -> {"distances": [[...], ...]}
+    POST /route   {"pairs": [[node, node], ...], "weight": "length", "paths": false}
+                                                   -> {"distances": [...], "paths": [[node, ...], ...]}
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+# Ensure project root (containing `Simulation_Frame`) is on sys.path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from Simulation_Frame import OSMRouter
+from Simulation_Frame.constants import Constants
+
+# Origins searched per Dijkstra call, bounds the (origins x graph nodes) array
+ORIGIN_BLOCK = 256
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+# One thread runs every query: the event loop keeps accepting connections
+# while the router's caches are only ever touched from a single thread.
+EXECUTOR = ThreadPoolExecutor(max_workers=1)
+
+
+# ---------------- QUERIES ----------------
+def _json_distances(arr: np.ndarray) -> list:
+    return [None if np.isinf(d) else float(d) for d in arr.tolist()]
+
+
+def handle_health(_: dict) -> dict:
+    graph = OSMRouter.get_routing_graph()
+    return {"nodes": len(graph), "edges": graph.num_edges, "weights": list(graph.weights)}
+
+
+def handle_nearest(body: dict) -> dict:
+    points = body.get("points", [])
+    if not points:
+        return {"nodes": []}
+    return {"nodes": OSMRouter.snap_points(points).tolist()}
+
+
+def handle_matrix(body: dict) -> dict:
+    graph = OSMRouter.get_routing_graph()
+    weight = body.get("weight", "length")
+    sources = graph.index_of(body["sources"])
+    targets = graph.index_of(body.get("targets", body["sources"]))
+    rows = []
+    for start in range(0, len(sources), ORIGIN_BLOCK):
+        dist = graph.distances_from(sources[start:start + ORIGIN_BLOCK], weight)
+        rows.extend(_json_distances(row) for row in dist[:, targets])
+    return {"distances": rows}
+
+
+def handle_route(body: dict) -> dict:
+    graph = OSMRouter.get_routing_graph()
+    weight = body.get("weight", "length")
+    want_paths = bool(body.get("paths", False))
+    pairs = body.get("pairs", [])
+    if not pairs:
+        return {"distances": [], "paths": []} if want_paths else {"distances": []}
+    nodes = graph.index_of(np.asarray(pairs).reshape(-1, 2))
+    distances = np.empty(len(nodes))
+    paths = [None] * len(nodes)
+    # one search per distinct origin serves every pair starting there
+    origins, inverse = np.unique(nodes[:, 0], return_inverse=True)
+    for start in range(0, len(origins), ORIGIN_BLOCK):
+        block = origins[start:start + ORIGIN_BLOCK]
+        result = dijkstra(graph.csr(weight), directed=True, indices=block, return_predecessors=want_paths)
+        dist, predecessors = result if want_paths else (result, None)
+        for i in np.flatnonzero((inverse >= start) & (inverse < start + len(block))):
+            row = inverse[i] - start
+            target = nodes[i, 1]
+            distances[i] = dist[row, target]
+            if want_paths:
+                paths[i] = _walk(predecessors[row], nodes[i, 0], target, graph) if np.isfinite(distances[i]) else []
+    response = {"distances": _json_distances(distances)}
+    if want_paths:
+        response["paths"] = paths
+    return response
+
+
+def _walk(predecessors: np.ndarray, source: int, target: int, graph) -> list:
+    path = [target]
+    while path[-1] != source:
+        path.append(predecessors[path[-1]])
+    return graph.node_ids[path[::-1]].tolist()
+
+
+ROUTES = {
+    ("GET", "/health"): handle_health,
+    ("POST", "/nearest"): handle_nearest,
+    ("POST", "/matrix"): handle_matrix,
+    ("POST", "/route"): handle_route,
+}
+# -------------------------------------------
+
+
+# ---------------- HTTP ----------------
+async def _respond(writer: asyncio.StreamWriter, status: int, reason: str, payload: dict, keep_alive: bool) -> None:
+    data = json.dumps(payload).encode()
+    head = (
+        f"HTTP/1.1 {status} {reason}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(data)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode() + data)
+    await writer.drain()
+
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            lines = head.decode("latin-1").split("\r\n")
+            headers = {}
+            for line in lines[1:]:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+            try:
+                method, path, version = lines[0].split(" ", 2)
+                length = int(headers.get("content-length", 0))
+                if length < 0:
+                    raise ValueError(f"negative Content-Length {length}")
+            except ValueError as exc:
+                # the body cannot be found without a valid request line and length, so close after replying
+                await _respond(writer, 400, "Bad Request", {"error": f"malformed request: {exc}"}, False)
+                break
+            keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+            if length > MAX_BODY_BYTES:
+                await _respond(writer, 413, "Payload Too Large", {"error": "request body too large"}, False)
+                break
+            body = await reader.readexactly(length) if length else b""
+
+            handler = ROUTES.get((method, path.split("?", 1)[0]))
+            if handler is None:
+                await _respond(writer, 404, "Not Found", {"error": f"no route for {method} {path}"}, keep_alive)
+            else:
+                try:
+                    payload = json.loads(body) if body else {}
+                    result = await loop.run_in_executor(EXECUTOR, handler, payload)
+                except (KeyError, ValueError, TypeError) as exc:
+                    await _respond(writer, 400, "Bad Request", {"error": str(exc)}, keep_alive)
+                else:
+                    await _respond(writer, 200, "OK", result, keep_alive)
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+
+async def serve(host: str, port: int) -> None:
+    server = await asyncio.start_server(handle_connection, host, port)
+    print(f"Routing service listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+# -------------------------------------------
+
+
+# ---------------- RUN ----------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local road routing service")
+    parser.add_argument("--lat", type=float, required=True)
+    parser.add_argument("--lon", type=float, required=True)
+    parser.add_argument("--dist", type=float, default=5000)
+    parser.add_argument("--network-type", default="drive")
+    parser.add_argument("--graphml", default=None, help="load the graph from a local GraphML file")
+    parser.add_argument("--host", default=Constants.ROAD_SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=Constants.ROAD_SERVICE_PORT)
+    parser.add_argument("--adaptive", action="store_true", help="fill the heuristic weight with the adaptive edge model")
+    args = parser.parse_args()
+
+    OSMRouter.init_graph((args.lat, args.lon), dist=args.dist, network_type=args.network_type,
+                         graphml_path=args.graphml, keep_graph=args.adaptive)
+    if args.adaptive:
+        OSMRouter.initialize_adaptive_edges(OSMRouter.get_graph())
+        OSMRouter.update_weights("heuristic")
+    asyncio.run(serve(args.host, args.port))
@@ -0,0 +1,62 @@
+import os
+import random
+import sys
+
+import networkx as nx
+import osmnx as ox
+import pytest
+
+# Ensure project root (containing `Simulation_Frame`) is on sys.path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from Simulation_Frame import OSMRouter, Simulation, Node, Location
+
+LAT0, LON0 = 10.99, 77.0
+STEP = 0.001
+
+
+def street_grid(n: int = 12, seed: int = 0) -> nx.MultiDiGraph:
+    """Jittered n x n street grid in the form osmnx downloads, every street in both directions."""
+    rng = random.Random(seed)
+    G = nx.MultiDiGraph(crs="epsg:4326")
+    node_id = lambda i, j: 1000 + i * n + j
+    for i in range(n):
+        for j in range(n):
+            G.add_node(node_id(i, j), x=LON0 + j * STEP + rng.uniform(-2e-4, 2e-4),
+                       y=LAT0 + i * STEP + rng.uniform(-2e-4, 2e-4), street_count=4)
+    osmid = 0
+    for i in range(n):
+        for j in range(n):
+            for a, b in ((i, j + 1), (i + 1, j)):
+                if a >= n or b >= n:
+                    continue
+                u, v = node_id(i, j), node_id(a, b)
+                length = ox.distance.great_circle(G.nodes[u]["y"], G.nodes[u]["x"], G.nodes[v]["y"], G.nodes[v]["x"])
+                osmid += 1
+                G.add_edge(u, v, osmid=osmid, length=length * rng.uniform(1.0, 1.3), oneway=False, reversed=False)
+                G.add_edge(v, u, osmid=osmid, length=G.edges[u, v, 0]["length"], oneway=False, reversed=True)
+    return G
+
+
+@pytest.fixture
+def road_grid(tmp_path):
+    """Load a 12 x 12 street grid into OSMRouter, without contracting chains."""
+    path = tmp_path / "grid.graphml"
+    ox.save_graphml(street_grid(), path)
+    OSMRouter.init_graph((LAT0, LON0), graphml_path=str(path), cache_dir=None, contract_chains=False)
+    span = STEP * 11
+    return LAT0, LAT0 + span, LON0, LON0 + span
+
+
+def scenario(bounds, size: int, seed: int, items=("a", "b", "c")) -> Simulation:
+    """size random nodes inside bounds, snapped to the road graph."""
+    latmin, latmax, lonmin, lonmax = bounds
+    rng = random.Random(seed)
+    sim = Simulation(1, 0, 10, items=list(items), latmin=latmin, latmax=latmax, longmin=lonmin, longmax=lonmax)
+    for _ in range(size):
+        value = rng.choice([-1, 1]) * rng.randint(1, 10)
+        sim.add_node(Node(rng.choice(items), value, Location(rng.uniform(lonmin, lonmax), rng.uniform(latmin, latmax))))
+    sim.snap_nodes()
+    return sim
@@ -0,0 +1,60 @@
+import numpy as np
+import osmnx as ox
+import pytest
+
+from conftest import LAT0, LON0, STEP, scenario, street_grid
+from Simulation_Frame import OSMRouter
+from Simulation_Frame.distancematrix import DistanceMatrix
+
+
+@pytest.fixture
+def graphml(tmp_path):
+    path = tmp_path / "grid.graphml"
+    ox.save_graphml(street_grid(), path)
+    return str(path)
+
+
+def no_graphml(*args, **kwargs):
+    raise AssertionError("the graph should come from the cache")
+
+
+def no_search(*args, **kwargs):
+    raise AssertionError("the matrix should come from the cache")
+
+
+def test_cached_graph_round_trip(graphml, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    OSMRouter.init_graph((LAT0, LON0), graphml_path=graphml, cache_dir=cache_dir, keep_graph=True)
+    built, built_nx = OSMRouter.get_routing_graph(), OSMRouter.get_graph()
+
+    monkeypatch.setattr(ox, "load_graphml", no_graphml)
+    OSMRouter.init_graph((LAT0, LON0), graphml_path=graphml, cache_dir=cache_dir, keep_graph=True)
+    cached, cached_nx = OSMRouter.get_routing_graph(), OSMRouter.get_graph()
+
+    assert cached is not built
+    for name in ("node_ids", "coords", "indptr", "indices"):
+        np.testing.assert_array_equal(getattr(cached, name), getattr(built, name))
+    assert cached.weights.keys() == built.weights.keys()
+    for weight in built.weights:
+        np.testing.assert_array_equal(cached.weights[weight], built.weights[weight])
+    np.testing.assert_array_equal(cached.distances_from([0, len(built) // 2]), built.distances_from([0, len(built) // 2]))
+    assert dict(cached_nx.nodes(data=True)) == dict(built_nx.nodes(data=True))
+    assert sorted(cached_nx.edges(keys=True, data="length")) == sorted(built_nx.edges(keys=True, data="length"))
+
+
+def test_persisted_matrix_round_trip(graphml, tmp_path, monkeypatch):
+    OSMRouter.init_graph((LAT0, LON0), graphml_path=graphml, cache_dir=str(tmp_path / "cache"), contract_chains=False)
+    span = STEP * 11
+    sim = scenario((LAT0, LAT0 + span, LON0, LON0 + span), size=40, seed=0)
+    computed = DistanceMatrix(sim.nodes).compute()
+    assert isinstance(computed.table, np.ndarray) and not isinstance(computed.table, np.memmap)
+
+    graph = OSMRouter.get_routing_graph()
+    monkeypatch.setattr(graph, "distances_from", no_search)
+    loaded = DistanceMatrix(sim.nodes).compute()
+    assert isinstance(loaded.table, np.memmap)
+    np.testing.assert_array_equal(loaded.matrix, computed.matrix)
+
+    monkeypatch.undo()
+    nodes = graph.index_of([node.location.get_node() for node in sim.nodes])
+    np.testing.assert_allclose(loaded.matrix, graph.distances_from(nodes)[:, nodes])
@@ -0,0 +1,66 @@
+import random
+from collections import defaultdict
+
+from Simulation_Frame import Simulation, Node, Location
+from Simulation_Frame.itemindex import ItemIndex
+
+ITEMS = ["a", "b", "c"]
+
+
+def scanned_groups(sim: Simulation) -> dict:
+    """What the item index should hold, by a scan over every node."""
+    groups = defaultdict(list)
+    for node in sim.nodes:
+        if not sim.is_node_satisfied(node):
+            groups[(node.item, node.is_source)].append((abs(node.value), node.id))
+    return {key: sorted(group) for key, group in groups.items()}
+
+
+def indexed_groups(sim: Simulation, index: ItemIndex) -> dict:
+    store = sim.store
+    return {(store.items[code], is_source): list(group) for (code, is_source), group in index.groups.items() if group}
+
+
+def check(sim: Simulation) -> None:
+    expected = scanned_groups(sim)
+    assert indexed_groups(sim, sim.store.index) == expected
+    assert indexed_groups(sim, ItemIndex.build(sim.store)) == expected
+    for item in ITEMS:
+        sinks = expected.get((item, False), [])
+        assert [node.id for node in sim.unsatisfied_sinks(item)] == [i for _, i in sinks]
+        assert [node.id for node in sim.unsatisfied_sinks(item, 5)] == [i for value, i in sinks if value <= 5]
+        assert [node.id for node in sim.unsatisfied_sinks(item, 5, strict=True)] == [i for value, i in sinks if value < 5]
+        assert [node.id for node in sim.unsatisfied_sources(item)] == [i for _, i in expected.get((item, True), [])]
+        smallest = sim.smallest_unsatisfied_sink(item)
+        assert (smallest.id if smallest else None) == (sinks[0][1] if sinks else None)
+        fitting = [(value, -i) for value, i in sinks if value <= 6]
+        largest = sim.largest_unsatisfied_sink(item, 6)
+        assert (largest.id if largest else None) == (-max(fitting)[1] if fitting else None)
+
+
+def random_node(rng: random.Random) -> Node:
+    return Node(rng.choice(ITEMS), rng.choice([-1, 1]) * rng.randint(1, 10), Location(rng.random(), rng.random()))
+
+
+def test_item_index_matches_full_scan():
+    rng = random.Random(0)
+    sim = Simulation(1, 0, 10, items=ITEMS)
+    for _ in range(30):
+        sim.add_node(random_node(rng))
+    check(sim)
+    for step in range(300):
+        nodes = sim.nodes
+        node = rng.choice(nodes)
+        action = rng.randrange(5)
+        if action == 0:
+            sim.add_node(random_node(rng))
+        elif action == 1 and not node.is_source and node.value < -1:
+            sim.add_node(node.split_sink(rng.randint(node.value + 1, -1)))
+        elif action == 2 and node.is_source and node.value > 1:
+            node.reduce_source(rng.randint(1, node.value - 1))
+        elif action == 3:
+            sim.satisfy_node(node)
+        else:
+            sim.unsatisfy_node(node)
+        check(sim)
+    assert sim.unsatisfied_count == sum(len(group) for group in scanned_groups(sim).values())
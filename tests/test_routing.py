@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from conftest import LAT0, LON0
+from Simulation_Frame import OSMRouter, Location
+from Simulation_Frame.constants import Constants
+
+
+def test_reset_routing_stats_zeroes_cache_counters(road_grid):
+    a, b = Location(LON0, LAT0), Location(LON0 + 0.01, LAT0 + 0.01)
+    for _ in range(2):
+        OSMRouter.route_legs([(a, b)])
+        OSMRouter.node_distance(a.get_node(), b.get_node())
+    stats = OSMRouter.routing_stats()
+    assert stats["distance_cache"]["hits"] and stats["route_cache"]["hits"]
+
+    OSMRouter.reset_routing_stats()
+    stats = OSMRouter.routing_stats()
+    for cache in ("distance_cache", "route_cache"):
+        assert stats[cache]["hits"] == stats[cache]["misses"] == 0
+    # entries stay cached, so the next lookup is a hit again
+    OSMRouter.route_legs([(a, b)])
+    assert OSMRouter.route_cache_stats()["hits"] == 1
+
+
+@pytest.mark.parametrize("detour", [2.0, 0.5])
+def test_plain_point_search_matches_full_dijkstra(road_grid, monkeypatch, detour):
+    # with a detour below 1 the limited search never reaches the destination and falls back
+    monkeypatch.setattr(Constants, "POINT_SEARCH_DETOUR", detour)
+    graph = OSMRouter.get_routing_graph()
+    rng = np.random.default_rng(0)
+    for orig, dest in rng.integers(len(graph), size=(40, 2)).tolist():
+        expected = graph.distances_from(orig)[dest]
+        u, v = graph.node_ids[[orig, dest]].tolist()
+        assert OSMRouter.node_distance(u, v) == pytest.approx(expected)
+
+
+def random_pairs(graph, count: int = 60, seed: int = 0) -> list:
+    return np.random.default_rng(seed).integers(len(graph), size=(count, 2)).tolist()
+
+
+def test_contraction_hierarchy_matches_dijkstra(road_grid):
+    OSMRouter.build_contraction_hierarchy(persist=False)
+    OSMRouter.reset_routing_stats()
+    graph = OSMRouter.get_routing_graph()
+    for orig, dest in random_pairs(graph):
+        u, v = graph.node_ids[[orig, dest]].tolist()
+        assert OSMRouter.node_distance(u, v) == pytest.approx(graph.distances_from(orig)[dest])
+    assert OSMRouter.routing_stats()["answered_by"]["hierarchy"]
+
+
+def test_landmarks_match_dijkstra(road_grid):
+    OSMRouter.build_landmarks(k=4)
+    OSMRouter.reset_routing_stats()
+    graph = OSMRouter.get_routing_graph()
+    for orig, dest in random_pairs(graph, seed=1):
+        u, v = graph.node_ids[[orig, dest]].tolist()
+        assert OSMRouter.node_distance(u, v) == pytest.approx(graph.distances_from(orig)[dest])
+    assert OSMRouter.routing_stats()["answered_by"]["landmarks"]
+
+
+def test_oracle_error_within_cell_radii(road_grid):
+    oracle = OSMRouter.build_distance_oracle(cell_m=300)
+    assert len(oracle.representatives) > 4
+    graph = OSMRouter.get_routing_graph()
+    for orig, dest in random_pairs(graph, count=200, seed=2):
+        u, v = graph.node_ids[[orig, dest]].tolist()
+        estimate, bound = OSMRouter.approx_distance(u, v)
+        assert bound == pytest.approx(0.0 if orig == dest else oracle.radius[orig] + oracle.radius[dest])
+        assert abs(graph.distances_from(orig)[dest] - estimate) <= bound + 1e-6
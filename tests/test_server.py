@@ -0,0 +1,86 @@
+import asyncio
+import importlib.util
+import os
+import socket
+import threading
+
+import numpy as np
+import pytest
+
+from conftest import PROJECT_ROOT
+from Simulation_Frame import OSMRouter
+from Simulation_Frame.roadclient import RoadClient
+
+
+def load_server():
+    spec = importlib.util.spec_from_file_location("road_server", os.path.join(PROJECT_ROOT, "road-microservice", "server.py"))
+    server = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(server)
+    return server
+
+
+@pytest.fixture
+def service(road_grid):
+    """The routing service on the street grid, listening on a free local port."""
+    server = load_server()
+    loop = asyncio.new_event_loop()
+    listening = loop.run_until_complete(asyncio.start_server(server.handle_connection, "127.0.0.1", 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield listening.sockets[0].getsockname()[:2]
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    listening.close()
+    loop.run_until_complete(listening.wait_closed())
+    loop.close()
+
+
+def raw_request(address, data: bytes) -> bytes:
+    with socket.create_connection(address, timeout=5) as sock:
+        sock.sendall(data)
+        reply = b""
+        while chunk := sock.recv(4096):
+            reply += chunk
+    return reply
+
+
+@pytest.mark.parametrize("request_head", [
+    b"GARBAGE\r\n\r\n",
+    b"POST /matrix HTTP/1.1\r\nContent-Length: many\r\n\r\n",
+    b"POST /matrix HTTP/1.1\r\nContent-Length: -4\r\n\r\n",
+])
+def test_malformed_request_gets_bad_request(service, request_head):
+    # the connection is closed after the reply, so reading to the end returns
+    reply = raw_request(service, request_head)
+    assert reply.startswith(b"HTTP/1.1 400 Bad Request\r\n")
+    assert b"Connection: close" in reply
+
+
+@pytest.fixture
+def client(service):
+    client = RoadClient(*service, batch=16)
+    yield client
+    client.close()
+
+
+def test_matrix_matches_local_router(client):
+    graph = OSMRouter.get_routing_graph()
+    rng = np.random.default_rng(0)
+    sources, targets = rng.choice(len(graph), 20, replace=False), rng.choice(len(graph), 7, replace=False)
+    table = client.matrix(graph.node_ids[sources].tolist(), graph.node_ids[targets].tolist())
+    np.testing.assert_allclose(table, graph.distances_from(sources)[:, targets])
+
+
+def test_route_matches_local_router(client):
+    graph = OSMRouter.get_routing_graph()
+    pairs = graph.node_ids[np.random.default_rng(1).integers(len(graph), size=(30, 2))].tolist()
+    expected = [OSMRouter.node_distance(u, v) for u, v in pairs]
+    assert client.distances(pairs) == pytest.approx(expected)
+
+    distances, paths = client.legs(pairs)
+    assert distances == pytest.approx(expected)
+    lengths = graph.csr("length")
+    for (u, v), path, distance in zip(pairs, paths, distances):
+        assert path[0] == u and path[-1] == v
+        steps = graph.index_of(path)
+        assert sum(lengths[a, b] for a, b in zip(steps[:-1], steps[1:])) == pytest.approx(distance)
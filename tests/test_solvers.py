@@ -0,0 +1,58 @@
+import io
+import contextlib
+from collections import Counter
+
+import pytest
+
+from conftest import scenario, LAT0, LON0, STEP
+from Simulation_Frame import Simulation, Node, Location
+from Solutions.multisinkdirectmatching import MultiSinkDirectMatching
+from Solutions.warehouses import Warehouses
+
+
+def solve(solution):
+    with contextlib.redirect_stdout(io.StringIO()):
+        solution.solve()
+    return solution
+
+
+# totals from the node-scan version of MultiSinkDirectMatching; sinks snapped
+# to the same road node must still be visited in node order
+@pytest.mark.parametrize("seed,distance,unsatisfied", [
+    (3, 28717.884215730162, 56),
+    (5, 37464.99828074103, 39),
+])
+def test_multisink_matches_node_order(road_grid, seed, distance, unsatisfied):
+    sim = scenario(road_grid, 150, seed)
+    solution = solve(MultiSinkDirectMatching(sim))
+    assert solution.get_total_distance() == pytest.approx(distance, rel=1e-9)
+    assert len(sim.get_unsatisfied_nodes()) == unsatisfied
+
+
+def test_warehouses_delivers_each_item_from_its_own_supply(road_grid):
+    sim = scenario(road_grid, 150, 2)
+    supply = Counter()
+    for node in sim.get_nodes():
+        if node.is_source:
+            supply[node.item] += node.value
+    solution = solve(Warehouses(sim))
+
+    delivered = Counter()
+    for node in sim.get_satisfied_nodes():
+        if not node.is_source:
+            delivered[node.item] += abs(node.value)
+    for item, amount in delivered.items():
+        assert amount <= supply[item]
+    assert solution.get_total_distance() == pytest.approx(71888.92195648642, rel=1e-9)
+    assert len(sim.get_unsatisfied_nodes()) == 11
+
+
+def test_warehouses_supply_nobody_needs(road_grid):
+    # drivers leave the warehouse with only "b", which no sink asks for
+    latmin, latmax, lonmin, lonmax = road_grid
+    sim = Simulation(1, 0, 10, items=["a", "b"], latmin=latmin, latmax=latmax, longmin=lonmin, longmax=lonmax)
+    for i, (item, value) in enumerate([("b", 5), ("b", 4), ("a", -3), ("a", -2)]):
+        sim.add_node(Node(item, value, Location(LON0 + STEP * (2 + i), LAT0 + STEP * (2 + i))))
+    sim.snap_nodes()
+    solve(Warehouses(sim))
+    assert not any(sim.is_node_satisfied(node) for node in sim.get_nodes() if not node.is_source)
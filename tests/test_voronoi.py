@@ -0,0 +1,25 @@
+import random
+
+import pytest
+
+from Simulation_Frame import Location
+from Simulation_Frame.voronoi import WarehouseVoronoi
+from Simulation_Frame.warehouse import Warehouse
+
+
+def random_location(rng: random.Random, bounds) -> Location:
+    latmin, latmax, lonmin, lonmax = bounds
+    return Location(rng.uniform(lonmin, lonmax), rng.uniform(latmin, latmax))
+
+
+def test_nearest_matches_brute_force(road_grid):
+    rng = random.Random(0)
+    warehouses = [Warehouse([], random_location(rng, road_grid)) for _ in range(4)]
+    voronoi = WarehouseVoronoi(warehouses).compute()
+    locations = [random_location(rng, road_grid) for _ in range(100)]
+    for location, (warehouse, distance) in zip(locations, voronoi.nearest_many(locations)):
+        expected = min(warehouses, key=lambda w: location.get_distance(w.location))
+        assert distance == pytest.approx(location.get_distance(expected.location))
+        assert voronoi.nearest(location) == (warehouse, distance)
+        # a different warehouse is only acceptable on an exact tie
+        assert warehouse is expected or location.get_distance(warehouse.location) == pytest.approx(distance)